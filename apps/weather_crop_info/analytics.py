@@ -0,0 +1,103 @@
+"""
+    This module contains the analytics of weather_crop_info app, computed
+    in the database with a single aggregate query rather than over records
+    pulled through the apis.
+
+    Author: Chandrahas Reddy Mandapati
+"""
+from django.db import connection
+
+from .models import CropYieldRecord, WeatherStationStats
+from .periods import YEAR_PERIOD
+
+# national aggregates of the weather station stats correlated with the yield.
+CORRELATED_METRICS = ('avg_max_temp', 'avg_min_temp', 'total_precipitation')
+
+
+def pearson_sql(metric):
+    """
+        Pearson correlation of the yield with a metric, over the years where
+        the metric is known, as a window aggregate over the deviations from
+        the means. The two pass form is numerically stable and portable,
+        unlike the single pass sums of squares.
+
+        Args:
+        metric (String): one of CORRELATED_METRICS.
+
+        Returns:
+            String: SQL expression.
+    """
+    return f"SUM(yield_deviation_{metric} * {metric}_deviation) OVER () / \
+SQRT(NULLIF(SUM(yield_deviation_{metric} * yield_deviation_{metric}) OVER () * \
+SUM({metric}_deviation * {metric}_deviation) OVER (), 0))"
+
+
+def yield_weather_correlation(start_year=None, end_year=None):
+    """
+        Yield of every year next to the national aggregates of the yearly
+        weather station stats, i.e. their averages over the stations, with the
+        Pearson correlations of the yield with each of them. Computed in one
+        query: the stats are aggregated by year, joined with the yield, and
+        the correlations are window aggregates over the joined years.
+
+        Args:
+        start_year (int): first year, None for no lower bound.
+        end_year (int): last year, None for no upper bound.
+
+        Returns:
+            dict: correlations by metric, and the joined years.
+    """
+    conditions, params = ["period = %s"], [YEAR_PERIOD]
+    if start_year is not None:
+        conditions.append("year >= %s")
+        params.append(start_year)
+    if end_year is not None:
+        conditions.append("year <= %s")
+        params.append(end_year)
+    where = f"WHERE {' AND '.join(conditions)}"
+
+    # deviations of the yield are taken from its mean over the years where
+    # the metric is known, so that both sides cover the same years.
+    deviations = ', '.join(
+        f"{metric} - AVG({metric}) OVER () AS {metric}_deviation, \
+CASE WHEN {metric} IS NOT NULL THEN CAST(total_yield AS DOUBLE PRECISION) - \
+AVG(CASE WHEN {metric} IS NOT NULL THEN CAST(total_yield AS DOUBLE PRECISION) END) OVER () \
+END AS yield_deviation_{metric}"
+        for metric in CORRELATED_METRICS)
+    correlations = ', '.join(
+        f"{pearson_sql(metric)} AS {metric}_correlation" for metric in CORRELATED_METRICS)
+
+    query = f"""
+        WITH national_stats AS (
+            SELECT year, AVG(avg_max_temp) AS avg_max_temp, AVG(avg_min_temp) AS avg_min_temp,
+                   AVG(total_precipitation) AS total_precipitation, COUNT(*) AS stations_count
+            FROM {WeatherStationStats._meta.db_table}
+            {where}
+            GROUP BY year
+        ), yield_weather AS (
+            SELECT crop_yield.year, crop_yield.total_yield, national_stats.avg_max_temp,
+                   national_stats.avg_min_temp, national_stats.total_precipitation,
+                   national_stats.stations_count
+            FROM {CropYieldRecord._meta.db_table} crop_yield
+            INNER JOIN national_stats ON national_stats.year = crop_yield.year
+        ), deviations AS (
+            SELECT yield_weather.*, {deviations}
+            FROM yield_weather
+        )
+        SELECT year, total_yield, avg_max_temp, avg_min_temp, total_precipitation,
+               stations_count, {correlations}
+        FROM deviations
+        ORDER BY year
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        columns = [column[0] for column in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    return {
+        'correlations': {
+            metric: rows[0][f'{metric}_correlation'] if rows else None
+            for metric in CORRELATED_METRICS
+        },
+        'years': rows,
+    }
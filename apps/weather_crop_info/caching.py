@@ -0,0 +1,123 @@
+"""
+    This module contains the response caching of weather_crop_info app.
+    Cached pages are keyed by the generation of their dataset, stored in the
+    DatasetGeneration model, and by their normalized query parameters. The
+    scripts bump the generation whenever they write the dataset, which
+    invalidates every cached page of it at once.
+
+    Pages of data changing too often to be cached are validated instead,
+    from an aggregate over the matching records.
+
+    Author: Chandrahas Reddy Mandapati
+"""
+from hashlib import sha1
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+from .models import DatasetGeneration
+
+# dataset name of WeatherStationStats model.
+STATS_DATASET = 'weather_station_stats'
+
+
+def bump_generation(name):
+    """
+        Bumps the generation of a dataset. Invoked after writing the dataset.
+
+        Args:
+        name (String): dataset name.
+
+        Returns:
+            None.
+    """
+    now = timezone.now()
+    DatasetGeneration.objects.bulk_create(
+        [DatasetGeneration(name=name, update_timestamp=now)], ignore_conflicts=True)
+    DatasetGeneration.objects.filter(name=name).update(
+        generation=F('generation') + 1, update_timestamp=now)
+
+
+def get_generation(name):
+    """
+        Current generation of a dataset, created on first use.
+
+        Args:
+        name (String): dataset name.
+
+        Returns:
+            DatasetGeneration: current generation.
+    """
+    generation, _ = DatasetGeneration.objects.get_or_create(
+        name=name, defaults={'update_timestamp': timezone.now()})
+    return generation
+
+
+def response_cache():
+    """
+        Cache holding the api pages, as set in STATS_CACHE_ALIAS setting.
+
+        Returns:
+            BaseCache: cache backend.
+    """
+    return caches[getattr(settings, 'STATS_CACHE_ALIAS', 'default')]
+
+
+def page_key(generation, query_params, page_size):
+    """
+        Cache key of an api page, independent of the order of the query
+        parameters. The generation timestamp keeps the key unique even if
+        the generation counter were ever reset.
+
+        Args:
+        generation (DatasetGeneration): current generation of the dataset.
+        query_params (QueryDict): query parameters of the request.
+        page_size (int): page size of the api.
+
+        Returns:
+            String: cache key.
+    """
+    params = urlencode(sorted(
+        (key, value) for key in query_params for value in query_params.getlist(key)))
+    return f"{generation.name}:{generation.generation}:\
+{generation.update_timestamp.timestamp()}:{page_size}:{sha1(params.encode()).hexdigest()}"
+
+
+def page_etag(key):
+    """
+        Weak entity tag of an api page, the representation (e.g. JSON or the
+        browsable api) may differ while the data is the same.
+
+        Args:
+        key (String): cache key of the page.
+
+        Returns:
+            String: entity tag.
+    """
+    return f'W/"{sha1(key.encode()).hexdigest()}"'
+
+
+def queryset_etag(queryset, query_params, page_size):
+    """
+        Weak entity tag of an api page computed from the matching records,
+        with a single aggregate query: the latest update_timestamp catches
+        inserts and updates, the count catches deletes.
+
+        Args:
+        queryset (QuerySet): filtered records of a model with update_timestamp.
+        query_params (QueryDict): query parameters of the request.
+        page_size (int): page size of the api.
+
+        Returns:
+            String: entity tag.
+            int: matching records count, reusable by a paginator.
+    """
+    validator = queryset.order_by().aggregate(
+        last_update=Max('update_timestamp'), records_count=Count('id'))
+    params = urlencode(sorted(
+        (key, value) for key in query_params for value in query_params.getlist(key)))
+    return page_etag(f"{validator['last_update']}:{validator['records_count']}:{page_size}:{params}"), \
+        validator['records_count']
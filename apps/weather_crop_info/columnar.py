@@ -0,0 +1,180 @@
+"""
+    This module contains the columnar (Arrow IPC and Parquet) responses of
+    weather_crop_info app. Record batches are built column by column from
+    queryset tuples and streamed as they are written, without going through
+    the serializers.
+
+    pyarrow is an optional dependency. Without it, no columnar renderer is
+    offered and the apis keep negotiating their default formats.
+
+    Author: Chandrahas Reddy Mandapati
+"""
+import io
+
+from django.http import StreamingHttpResponse
+from rest_framework import serializers
+from rest_framework.renderers import BaseRenderer
+
+from .parsers import batched
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# number of records per record batch, and per Parquet row group.
+COLUMNAR_CHUNK_SIZE = 65536
+
+
+def arrow_type(field):
+    """
+        Arrow type of a serializer field.
+
+        Args:
+        field (Field): serializer field.
+
+        Returns:
+            DataType: arrow type.
+    """
+    if isinstance(field, serializers.IntegerField):
+        return pa.int64()
+    if isinstance(field, serializers.FloatField):
+        return pa.float64()
+    if isinstance(field, serializers.BooleanField):
+        return pa.bool_()
+    if isinstance(field, serializers.DateTimeField):
+        return pa.timestamp('us', tz='UTC')
+    return pa.string()
+
+
+def arrow_schema(serializer_class):
+    """
+        Arrow schema matching the fields of a serializer, in declaration order.
+
+        Args:
+        serializer_class (Serializer): serializer of the records.
+
+        Returns:
+            Schema: arrow schema.
+    """
+    return pa.schema([(name, arrow_type(field))
+                      for name, field in serializer_class().fields.items()])
+
+
+class ChunkSink(io.RawIOBase):
+    """
+        Write-only file object handing out what has been written so far.
+        Keeps track of the position, which the Parquet writer relies on.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class ColumnarRenderer(BaseRenderer):
+    """
+        Base of the columnar renderers. Streams the record batches of
+        queryset tuples through a format specific writer.
+    """
+    charset = None
+    render_style = 'binary'
+
+    def open_writer(self, sink, schema):
+        raise NotImplementedError('ColumnarRenderer.open_writer() must be implemented.')
+
+    def stream(self, rows, schema, chunk_size=COLUMNAR_CHUNK_SIZE):
+        """
+            Encodes rows, record batch by record batch.
+
+            Args:
+            rows (Iterable): tuples ordered as the schema fields.
+            schema (Schema): arrow schema of the rows.
+            chunk_size (int): number of rows per record batch.
+
+            Returns:
+                Generator: encoded bytes.
+        """
+        sink = ChunkSink()
+        with self.open_writer(sink, schema) as writer:
+            for chunk in batched(rows, chunk_size):
+                writer.write_batch(pa.RecordBatch.from_arrays(
+                    [pa.array(column, type=field.type)
+                     for column, field in zip(zip(*chunk), schema)], schema=schema))
+                yield sink.drain()
+        yield sink.drain()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # responses that are not streamed, e.g. errors.
+        if data is None:
+            return b''
+        table = pa.Table.from_pylist(data if isinstance(data, list) else [data])
+        sink = ChunkSink()
+        with self.open_writer(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.drain()
+
+
+class ArrowIPCRenderer(ColumnarRenderer):
+    """
+        Renders Arrow IPC streaming format, zstd compressed when available.
+    """
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+
+    def open_writer(self, sink, schema):
+        compression = 'zstd' if pa.Codec.is_available('zstd') else None
+        return pa.ipc.new_stream(
+            sink, schema, options=pa.ipc.IpcWriteOptions(compression=compression))
+
+
+class ParquetRenderer(ColumnarRenderer):
+    """
+        Renders Parquet, a row group per record batch.
+    """
+    media_type = 'application/vnd.apache.parquet'
+    format = 'parquet'
+
+    def open_writer(self, sink, schema):
+        return pq.ParquetWriter(sink, schema)
+
+
+# columnar renderers offered by the apis, none without pyarrow.
+COLUMNAR_RENDERER_CLASSES = (ArrowIPCRenderer, ParquetRenderer) if pa is not None else ()
+
+
+def columnar_response(queryset, serializer_class, renderer, file_name):
+    """
+        Streams every record of a queryset in a columnar format.
+
+        Args:
+        queryset (QuerySet): records, in the streamed order.
+        serializer_class (ValuesSerializer): serializer declaring the columns.
+        renderer (ColumnarRenderer): accepted renderer.
+        file_name (String): attachment file name, without extension.
+
+        Returns:
+            StreamingHttpResponse: columnar response.
+    """
+    rows = serializer_class.values_list(queryset).iterator(chunk_size=COLUMNAR_CHUNK_SIZE)
+    response = StreamingHttpResponse(
+        renderer.stream(rows, arrow_schema(serializer_class)), content_type=renderer.media_type)
+    response['Content-Disposition'] = f'attachment; filename="{file_name}.{renderer.format}"'
+    return response
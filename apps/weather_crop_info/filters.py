@@ -3,16 +3,133 @@
 
     Author: Chandrahas Reddy Mandapati 
 """
+from datetime import datetime, timedelta
+from functools import reduce
+from operator import or_
+
 import coreapi
 import coreschema
+from django.db.models import Q
+from django.utils.timezone import make_aware
+from rest_framework.exceptions import ParseError
 from rest_framework.filters import BaseFilterBackend
 
+from .periods import period_names
+
+# station-id lookups by station-match query parameter. Exact and prefix
+# matches are served by the weather_station indexes, substring matches by
+# a trigram index on PostgreSQL when available, by a scan otherwise.
+STATION_MATCH_LOOKUPS = {
+    'exact': 'exact',
+    'prefix': 'startswith',
+    'contains': 'contains',
+}
+DEFAULT_STATION_MATCH = 'prefix'
+
+
+def station_id_filter(station_id, station_match=None):
+    """
+        Builds the station-id filter of the list apis. Several stations are
+        matched at once from a comma separated list.
+
+        Args:
+        station_id (String): comma separated real world station references,
+            or parts of them.
+        station_match (String): one of STATION_MATCH_LOOKUPS keys, defaults
+            to DEFAULT_STATION_MATCH.
+
+        Returns:
+            Q: filter on a model referencing WeatherStation model.
+
+        Raises:
+            ValueError: on an unknown station_match or an empty station list.
+    """
+    lookup = STATION_MATCH_LOOKUPS.get(station_match or DEFAULT_STATION_MATCH)
+    if lookup is None:
+        raise ValueError(f"Unknown station match {station_match}")
+    station_ids = [value.strip() for value in station_id.split(',') if value.strip()]
+    if not station_ids:
+        raise ValueError("No station id")
+
+    if lookup == 'exact':
+        return Q(weather_station__station_id__in=station_ids)
+    return reduce(or_, (Q(**{f'weather_station__station_id__{lookup}': value})
+                        for value in station_ids))
+
+
+def station_match_field():
+    """
+        Schema field of the station-match query parameter.
+
+        Returns:
+            Api schema field
+    """
+    return coreapi.Field(
+        name='station-match',
+        location='query',
+        required=False,
+        description="Station ID matching mode, defaults to prefix",
+        schema=coreschema.Enum(enum=list(STATION_MATCH_LOOKUPS))
+    )
+
+
+def aware_date(value):
+    """
+        Parses a YYYYMMDD query parameter into the midnight of that date in
+        the current time zone, as the weather records are stored.
+
+        Args:
+        value (String): date in YYYYMMDD format.
+
+        Returns:
+            datetime: timezone aware datetime.
+
+        Raises:
+            ValueError: on a malformed date.
+    """
+    return make_aware(datetime.strptime(value, '%Y%m%d'))
+
 
 class WeatherRecordFilterBackend(BaseFilterBackend):
     """
         Filter Backend handling filters for WeatherRecord model.
     """
 
+    def filter_queryset(self, request, queryset, view):
+        """
+            Filters weather records on the station-id, station-match, date,
+            start-date and end-date query parameters.
+
+            Returns:
+                QuerySet: filtered weather records.
+
+            Raises:
+                ParseError: on a malformed query parameter.
+        """
+        # retrieving query parameters
+        station_id = request.query_params.get('station-id')
+        station_match = request.query_params.get('station-match')
+        date = request.query_params.get('date')
+        start_date = request.query_params.get('start-date')
+        end_date = request.query_params.get('end-date')
+
+        # filtering based on the query parameters
+        try:
+            if station_id is not None:
+                queryset = queryset.filter(
+                    station_id_filter(station_id, station_match))
+            if date is not None:
+                queryset = queryset.filter(date=aware_date(date))
+            # both ends of the date range are inclusive.
+            if start_date is not None:
+                queryset = queryset.filter(date__gte=aware_date(start_date))
+            if end_date is not None:
+                queryset = queryset.filter(
+                    date__lt=aware_date(end_date) + timedelta(days=1))
+        except ValueError as e:
+            raise ParseError(str(e))
+        return queryset
+
     def get_schema_fields(self, view):
         """
             function responsible for providing schema fields to swagger doc
@@ -25,20 +142,70 @@ class WeatherRecordFilterBackend(BaseFilterBackend):
             name='station-id',
             location='query',
             required=False,
-            description="Weather Station ID",
+            description="Weather Station ID, or comma separated Weather Station IDs",
             schema=coreschema.String()
-        ), coreapi.Field(
+        ), station_match_field(), coreapi.Field(
             name='date',
             location='query',
             description="Date in YYYYMMDD format",
             schema=coreschema.String(format="YYYYMMDD"),
             required=False
+        ), coreapi.Field(
+            name='start-date',
+            location='query',
+            description="First date of a date range in YYYYMMDD format",
+            schema=coreschema.String(format="YYYYMMDD"),
+            required=False
+        ), coreapi.Field(
+            name='end-date',
+            location='query',
+            description="Last date of a date range in YYYYMMDD format",
+            schema=coreschema.String(format="YYYYMMDD"),
+            required=False
         ), coreapi.Field(
             name='page',
             location='query',
             description="Page Number",
             schema=coreschema.Integer(),
             required=False
+        ), coreapi.Field(
+            name='pagination',
+            location='query',
+            description="Set to cursor for keyset pagination, to stream for every \
+matching record in a single streamed response",
+            schema=coreschema.Enum(enum=['cursor', 'stream']),
+            required=False
+        ), coreapi.Field(
+            name='cursor',
+            location='query',
+            description="Cursor token of the next or previous link, \
+only applicable along with pagination=cursor",
+            schema=coreschema.String(),
+            required=False
+        )]
+
+
+class WeatherRecordExportFilterBackend(WeatherRecordFilterBackend):
+    """
+        Filter Backend handling filters for WeatherRecordExport api, which
+        takes the WeatherRecordList filters without the pagination ones.
+    """
+
+    def get_schema_fields(self, view):
+        """
+            function responsible for providing schema fields to swagger doc
+            for WeatherRecordExport api.
+
+            Returns:
+                Api schema
+        """
+        return [field for field in super().get_schema_fields(view)
+                if field.name not in ('page', 'pagination', 'cursor')] + [coreapi.Field(
+            name='format',
+            location='query',
+            description="Export format, ndjson by default",
+            schema=coreschema.Enum(enum=['ndjson', 'csv']),
+            required=False
         )]
 
 
@@ -59,15 +226,203 @@ class WeatherStationStatsFilterBackend(BaseFilterBackend):
             name='station-id',
             location='query',
             required=False,
-            description="Weather Station ID",
+            description="Weather Station ID, or comma separated Weather Station IDs",
             schema=coreschema.String()
-        ), coreapi.Field(
+        ), station_match_field(), coreapi.Field(
             name='year',
             location='query',
             description="Year in YYYY format",
             schema=coreschema.String(format="YYYY"),
             required=False
         ), coreapi.Field(
+            name='period',
+            location='query',
+            description="Period within the year, defaults to the whole year",
+            schema=coreschema.Enum(enum=list(period_names())),
+            required=False
+        ), coreapi.Field(
+            name='complete',
+            location='query',
+            description="Only stats within (true) or beyond (false) the missing data threshold",
+            schema=coreschema.Boolean(),
+            required=False
+        ), coreapi.Field(
+            name='page',
+            location='query',
+            description="Page Number",
+            schema=coreschema.Integer(),
+            required=False
+        )]
+
+
+def year_range(query_params):
+    """
+        Parses the start-year and end-year query parameters, both inclusive.
+
+        Args:
+        query_params (QueryDict): query parameters of the request.
+
+        Returns:
+            int: first year, None when not given.
+            int: last year, None when not given.
+
+        Raises:
+            ParseError: on a malformed year.
+    """
+    try:
+        return tuple(int(query_params[name]) if query_params.get(name) is not None else None
+                     for name in ('start-year', 'end-year'))
+    except ValueError as e:
+        raise ParseError(str(e))
+
+
+def year_range_fields():
+    """
+        Schema fields of the start-year and end-year query parameters.
+
+        Returns:
+            Api schema fields
+    """
+    return [coreapi.Field(
+        name='start-year',
+        location='query',
+        description="First year of a year range in YYYY format",
+        schema=coreschema.String(format="YYYY"),
+        required=False
+    ), coreapi.Field(
+        name='end-year',
+        location='query',
+        description="Last year of a year range in YYYY format",
+        schema=coreschema.String(format="YYYY"),
+        required=False
+    )]
+
+
+class CropYieldRecordFilterBackend(BaseFilterBackend):
+    """
+        Filter Backend handling filters for CropYieldRecord model.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        """
+            Filters crop yield records on the start-year and end-year query
+            parameters.
+
+            Returns:
+                QuerySet: filtered crop yield records.
+
+            Raises:
+                ParseError: on a malformed query parameter.
+        """
+        start_year, end_year = year_range(request.query_params)
+        if start_year is not None:
+            queryset = queryset.filter(year__gte=start_year)
+        if end_year is not None:
+            queryset = queryset.filter(year__lte=end_year)
+        return queryset
+
+    def get_schema_fields(self, view):
+        """
+            function responsible for providing schema fields to swagger doc
+            for CropYieldRecordList api.
+
+            Returns:
+                Api schema
+        """
+        return [*year_range_fields(), coreapi.Field(
+            name='page',
+            location='query',
+            description="Page Number",
+            schema=coreschema.Integer(),
+            required=False
+        )]
+
+
+class YieldWeatherCorrelationFilterBackend(BaseFilterBackend):
+    """
+        Filter Backend handling filters for YieldWeatherCorrelation api.
+    """
+
+    def get_schema_fields(self, view):
+        """
+            function responsible for providing schema fields to swagger doc
+            for YieldWeatherCorrelation api.
+
+            Returns:
+                Api schema
+        """
+        return year_range_fields()
+
+
+class WeatherRollupFilterBackend(BaseFilterBackend):
+    """
+        Filter Backend handling filters for the rollup models. Only the
+        filters applicable to the model of the view are offered.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        """
+            Filters rollups on the start-year and end-year query parameters,
+            on the month one for monthly rollups, and on the station-id and
+            station-match ones for station rollups.
+
+            Returns:
+                QuerySet: filtered rollups.
+
+            Raises:
+                ParseError: on a malformed query parameter.
+        """
+        fields = {field.name for field in queryset.model._meta.get_fields()}
+
+        # retrieving query parameters
+        start_year, end_year = year_range(request.query_params)
+        month = request.query_params.get('month')
+        station_id = request.query_params.get('station-id')
+        station_match = request.query_params.get('station-match')
+
+        # filtering based on the query parameters
+        if start_year is not None:
+            queryset = queryset.filter(year__gte=start_year)
+        if end_year is not None:
+            queryset = queryset.filter(year__lte=end_year)
+        try:
+            if month is not None and 'month' in fields:
+                queryset = queryset.filter(month=int(month))
+            if station_id is not None and 'weather_station' in fields:
+                queryset = queryset.filter(
+                    station_id_filter(station_id, station_match))
+        except ValueError as e:
+            raise ParseError(str(e))
+        return queryset
+
+    def get_schema_fields(self, view):
+        """
+            function responsible for providing schema fields to swagger doc
+            for the rollup apis.
+
+            Returns:
+                Api schema
+        """
+        fields = {field.name for field in view.model._meta.get_fields()}
+        schema_fields = []
+        if 'weather_station' in fields:
+            schema_fields += [coreapi.Field(
+                name='station-id',
+                location='query',
+                required=False,
+                description="Weather Station ID, or comma separated Weather Station IDs",
+                schema=coreschema.String()
+            ), station_match_field()]
+        schema_fields += year_range_fields()
+        if 'month' in fields:
+            schema_fields.append(coreapi.Field(
+                name='month',
+                location='query',
+                description="Month in M format",
+                schema=coreschema.Integer(),
+                required=False
+            ))
+        return schema_fields + [coreapi.Field(
             name='page',
             location='query',
             description="Page Number",
@@ -0,0 +1,128 @@
+"""
+    This module contains database loaders for weather_crop_info app.
+
+    Author: Chandrahas Reddy Mandapati
+"""
+from django.db import connection, transaction
+
+from .models import WeatherRecord
+
+# loader modes understood by the ingestion scripts.
+ORM_LOADER = 'orm'
+COPY_LOADER = 'copy'
+
+
+def resolve_loader(use_copy=False):
+    """
+        Resolves the loader mode to be used against the current database.
+        The COPY loader is PostgreSQL only, every other backend falls back
+        to the ORM bulk_create path.
+
+        Args:
+        use_copy (Boolean): whether the COPY loader was requested.
+
+        Returns:
+            String: ORM_LOADER or COPY_LOADER.
+    """
+    if use_copy and connection.vendor == 'postgresql':
+        return COPY_LOADER
+    return ORM_LOADER
+
+
+class IteratorFile:
+    """
+        Minimal read-only file object over an iterator of text lines.
+        Lets COPY FROM STDIN pull rows lazily instead of from a fully
+        materialized buffer.
+    """
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._buffer = ''
+
+    def read(self, size=-1):
+        """
+            Returns up to size characters, or everything left when size
+            is negative.
+        """
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._lines)
+            except StopIteration:
+                break
+        if size < 0:
+            chunk, self._buffer = self._buffer, ''
+        else:
+            chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+def _copy_value(value):
+    """
+        Encodes a single python value in COPY text format.
+    """
+    if value is None:
+        return '\\N'
+    return str(value)
+
+
+def copy_weather_records(rows, update_conflicts=False, author="ingest_weather_records_script"):
+    """
+        Streams weather rows into a temporary staging table with
+        COPY FROM STDIN and merges them into weather_record with a single
+        INSERT ... ON CONFLICT statement. Mirrors the bulk_create semantics
+        of the ORM loader: min_temp, max_temp, precipitation, update_by and
+        update_timestamp are updated on conflict when update_conflicts is
+        set, conflicting rows are skipped otherwise.
+
+        This implementation is PostgreSQL (psycopg2) only.
+
+        Args:
+        rows (Iterable): tuples of (weather_station_id, date, min_temp,
+            max_temp, precipitation).
+        update_conflicts (Boolean): upsert instead of skipping conflicts.
+        author (String): value stored in create_by and update_by.
+
+        Returns:
+            int: Inserted/Updated records count.
+    """
+    table = WeatherRecord._meta.db_table
+    lines = ('\t'.join(map(_copy_value, row)) + '\n' for row in rows)
+
+    if update_conflicts:
+        on_conflict = """
+            DO UPDATE SET min_temp = EXCLUDED.min_temp,
+                          max_temp = EXCLUDED.max_temp,
+                          precipitation = EXCLUDED.precipitation,
+                          update_by = EXCLUDED.update_by,
+                          update_timestamp = EXCLUDED.update_timestamp"""
+    else:
+        on_conflict = "DO NOTHING"
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"""
+            CREATE TEMPORARY TABLE {table}_staging (
+                weather_station_id bigint,
+                date timestamp with time zone,
+                min_temp double precision,
+                max_temp double precision,
+                precipitation double precision
+            ) ON COMMIT DROP""")
+        cursor.copy_expert(
+            f"COPY {table}_staging (weather_station_id, date, min_temp, max_temp, precipitation)"
+            " FROM STDIN", IteratorFile(lines))
+        cursor.execute(f"""
+            INSERT INTO {table} (weather_station_id, date, min_temp, max_temp, precipitation,
+                                 create_timestamp, create_by, update_timestamp, update_by)
+            SELECT weather_station_id, date, min_temp, max_temp, precipitation,
+                   now(), %s, now(), %s
+            FROM {table}_staging
+            ON CONFLICT (weather_station_id, date) {on_conflict}""", [author, author])
+        created_records_count = cursor.rowcount
+
+        # ON COMMIT DROP does not fire when nested inside an outer transaction.
+        cursor.execute(f"DROP TABLE {table}_staging")
+        return created_records_count
@@ -0,0 +1,102 @@
+"""
+    This module contains the run_ingestion_pipeline command for weather_crop_info app.
+    Runs crop yield ingestion, weather ingestion, weather station stats refresh
+    and weather rollups refresh as stages of a single pipeline, in a single process.
+
+    Author: Chandrahas Reddy Mandapati
+"""
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.weather_crop_info.parsers import list_files
+from apps.weather_crop_info.scripts.calculate_weather_station_stats import (
+    update_pending_weather_station_stats, update_weather_rollups)
+from apps.weather_crop_info.scripts.ingest_crop_yield_records import \
+    ingest_crop_yield_files
+from apps.weather_crop_info.scripts.ingest_weather_records import \
+    ingest_weather_files
+
+
+class Command(BaseCommand):
+    help = "Ingests crop yield and weather records and refreshes weather station stats and rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--update-conflicts', action='store_true',
+            help="Update the records on unique constraint violation.")
+        parser.add_argument(
+            '--copy', action='store_true',
+            help="Load the weather records through COPY on PostgreSQL.")
+        parser.add_argument(
+            '--ignore-ledger', action='store_true',
+            help="Re-ingest every weather station file in full.")
+        parser.add_argument(
+            '--pool-size', type=int,
+            help="Number of worker processes, defaults to INGESTION_POOL_SIZE setting.")
+
+    def handle(self, *args, **options):
+        """
+            Runs the pipeline stages and prints their timings. The stats of a
+            weather station are refreshed as soon as its file has been
+            committed, while the remaining files are still being ingested.
+
+            Args:
+                options: parsed command line options.
+
+            Returns:
+                None.
+        """
+        start_time = datetime.now()
+        timings = {}
+        stats_seconds = 0
+
+        # stage 1: crop yield records.
+        stage_start_time = datetime.now()
+        crop_yield_records_count = ingest_crop_yield_files(
+            list_files(settings.CROP_YIELD_DATA_DIR), options['update_conflicts'],
+            options['pool_size'])
+        timings['crop yield ingestion'] = datetime.now() - stage_start_time
+
+        # stage 2 and 3: weather records, with the stats of each station
+        # refreshed from the main process once its file has been committed.
+        def refresh_station_stats(file_path, records_count):
+            nonlocal stats_seconds
+            if records_count:
+                refresh_start_time = datetime.now()
+                update_pending_weather_station_stats(
+                    station_ids=[Path(file_path).stem])
+                stats_seconds += (datetime.now() -
+                                  refresh_start_time).total_seconds()
+
+        stage_start_time = datetime.now()
+        weather_records_count = ingest_weather_files(
+            list_files(settings.WEATHER_DATA_DIR),
+            update_conflicts=options['update_conflicts'],
+            use_copy=options['copy'],
+            incremental=not options['ignore_ledger'],
+            on_file_ingested=refresh_station_stats,
+            pool_size=options['pool_size'])
+        timings['weather ingestion'] = datetime.now() - stage_start_time
+
+        # sweep up the station years flagged by any other ingestion run.
+        stage_start_time = datetime.now()
+        update_pending_weather_station_stats()
+        stats_seconds += (datetime.now() - stage_start_time).total_seconds()
+
+        # stage 4: weather rollups, from the refreshed stats.
+        stage_start_time = datetime.now()
+        update_weather_rollups()
+        timings['rollups refresh'] = datetime.now() - stage_start_time
+
+        self.stdout.write(
+            f"Ingested {crop_yield_records_count} crop yield records and "
+            f"{weather_records_count} weather records")
+        for stage, elapsed in timings.items():
+            self.stdout.write(f"{stage:<24} {elapsed.total_seconds():10.3f} seconds")
+        self.stdout.write(
+            f"{'stats refresh':<24} {stats_seconds:10.3f} seconds (overlapping weather ingestion)")
+        self.stdout.write(
+            f"{'total':<24} {(datetime.now() - start_time).total_seconds():10.3f} seconds")
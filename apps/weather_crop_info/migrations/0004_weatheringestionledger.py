@@ -0,0 +1,29 @@
+# Generated by Django 4.1.6 on 2026-10-18 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_crop_info', '0003_alter_weatherrecord_weather_station_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeatherIngestionLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=200, unique=True, verbose_name='Ingested File Name')),
+                ('file_size', models.PositiveBigIntegerField(verbose_name='Ingested File Size in Bytes')),
+                ('file_mtime', models.FloatField(verbose_name='Ingested File Modification Time')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='SHA-256 of the Ingested File Content')),
+                ('last_ingested_date', models.DateTimeField(null=True, verbose_name='Last Ingested Weather Record Date')),
+                ('create_timestamp', models.DateTimeField(auto_now_add=True, verbose_name='Application Record Created Date')),
+                ('update_timestamp', models.DateTimeField(auto_now=True, verbose_name='Application Record Updated Date')),
+            ],
+            options={
+                'db_table': 'weather_ingestion_ledger',
+            },
+        ),
+    ]
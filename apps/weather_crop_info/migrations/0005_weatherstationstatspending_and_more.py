@@ -0,0 +1,31 @@
+# Generated by Django 4.1.6 on 2026-10-18 17:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_crop_info', '0004_weatheringestionledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeatherStationStatsPending',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField(verbose_name='Touched Weather Records Corresponding Year')),
+                ('create_timestamp', models.DateTimeField(auto_now_add=True, verbose_name='Application Record Created Date')),
+                ('update_timestamp', models.DateTimeField(auto_now=True, verbose_name='Application Record Updated Date')),
+                ('weather_station', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='weather_crop_info.weatherstation', verbose_name='Application Generated Station Reference')),
+            ],
+            options={
+                'db_table': 'weather_station_stats_pending',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='weatherstationstatspending',
+            constraint=models.UniqueConstraint(fields=('weather_station', 'year'), name='unique_pending_station_year_constraint'),
+        ),
+    ]
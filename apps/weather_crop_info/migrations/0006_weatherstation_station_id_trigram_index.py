@@ -0,0 +1,42 @@
+# Generated by Django 4.1.6 on 2026-10-18 18:11
+
+from django.db import migrations
+
+TRIGRAM_INDEX_NAME = 'station_id_trigram_index'
+
+
+def create_trigram_index(apps, schema_editor):
+    """
+        Backs substring station lookups (LIKE '%X%') with a trigram index,
+        only on PostgreSQL servers shipping the pg_trgm extension. Other
+        databases keep scanning the (small) weather_station table. Prefix
+        lookups (LIKE 'X%') are already served by the varchar_pattern_ops
+        index Django creates along with the unique station_id index.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX_NAME} '
+        'ON weather_station USING gin (station_id gin_trgm_ops)')
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {TRIGRAM_INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_crop_info', '0005_weatherstationstatspending_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.1.6 on 2026-10-18 18:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_crop_info', '0006_weatherstation_station_id_trigram_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='weatherrecord',
+            name='weather_station',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='weather_crop_info.weatherstation', verbose_name='Application Generated Station Reference'),
+        ),
+        migrations.AddIndex(
+            model_name='weatherrecord',
+            index=models.Index(fields=['date'], name='record_date_index'),
+        ),
+    ]
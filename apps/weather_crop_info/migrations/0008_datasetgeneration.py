@@ -0,0 +1,25 @@
+# Generated by Django 4.1.6 on 2026-10-18 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_crop_info', '0007_weatherrecord_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetGeneration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True, verbose_name='Cached Dataset Name')),
+                ('generation', models.PositiveBigIntegerField(default=0, verbose_name='Dataset Generation')),
+                ('update_timestamp', models.DateTimeField(verbose_name='Dataset Last Written Date')),
+            ],
+            options={
+                'db_table': 'dataset_generation',
+            },
+        ),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 4.1.6 on 2026-10-18 18:34
+
+from django.db import migrations, models
+
+# rollup queries as of this migration, later ones live in the rollups module.
+RECORD_DATE_PARTS = {
+    'postgresql': {
+        'year': "CAST(EXTRACT(YEAR FROM date AT TIME ZONE 'UTC') AS INTEGER)",
+        'month': "CAST(EXTRACT(MONTH FROM date AT TIME ZONE 'UTC') AS INTEGER)",
+    },
+    'default': {
+        'year': "CAST(strftime('%Y', date) AS INTEGER)",
+        'month': "CAST(strftime('%m', date) AS INTEGER)",
+    },
+}
+ROLLUPS = {
+    'station_month_rollup': ("""
+        SELECT weather_station_id * 1000000 + {year} * 100 + {month} AS id,
+               weather_station_id, {year} AS year, {month} AS month,
+               AVG(max_temp) AS avg_max_temp, AVG(min_temp) AS avg_min_temp,
+               SUM(precipitation) AS total_precipitation, COUNT(*) AS records_count
+        FROM weather_record
+        GROUP BY weather_station_id, {year}, {month}
+    """, ('weather_station_id', 'year', 'month')),
+    'national_month_rollup': ("""
+        SELECT year * 100 + month AS id, year, month,
+               AVG(avg_max_temp) AS avg_max_temp, AVG(avg_min_temp) AS avg_min_temp,
+               AVG(total_precipitation) AS total_precipitation, COUNT(*) AS stations_count
+        FROM station_month_rollup
+        GROUP BY year, month
+    """, ('year', 'month')),
+    'national_year_rollup': ("""
+        SELECT year AS id, year,
+               AVG(avg_max_temp) AS avg_max_temp, AVG(avg_min_temp) AS avg_min_temp,
+               AVG(total_precipitation) AS total_precipitation, COUNT(*) AS stations_count
+        FROM weather_station_stats
+        GROUP BY year
+    """, ('year',)),
+}
+
+
+def create_rollup_relations(apps, schema_editor):
+    """
+        Creates the relations backing the unmanaged rollup models, i.e.
+        materialized views on PostgreSQL and plain tables elsewhere, along
+        with their unique index (required by the concurrent refresh).
+    """
+    connection = schema_editor.connection
+    kind = 'MATERIALIZED VIEW' if connection.vendor == 'postgresql' else 'TABLE'
+    date_parts = RECORD_DATE_PARTS.get(connection.vendor, RECORD_DATE_PARTS['default'])
+    with connection.cursor() as cursor:
+        for table, (query, key) in ROLLUPS.items():
+            cursor.execute(f"CREATE {kind} {table} AS {query.format(**date_parts)}")
+            cursor.execute(f"CREATE UNIQUE INDEX {table}_key ON {table} ({', '.join(key)})")
+
+
+def drop_rollup_relations(apps, schema_editor):
+    connection = schema_editor.connection
+    kind = 'MATERIALIZED VIEW' if connection.vendor == 'postgresql' else 'TABLE'
+    with connection.cursor() as cursor:
+        for table in reversed(ROLLUPS):
+            cursor.execute(f"DROP {kind} IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_crop_info', '0008_datasetgeneration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NationalMonthRollup',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('year', models.PositiveIntegerField(verbose_name='Rollup Corresponding Year')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Rollup Corresponding Month')),
+                ('avg_max_temp', models.FloatField(null=True, verbose_name='Average Maximum Temperature per Month')),
+                ('avg_min_temp', models.FloatField(null=True, verbose_name='Average Minimum Temperature per Month')),
+                ('total_precipitation', models.FloatField(null=True, verbose_name='Average Station Total Precipitation per Month')),
+                ('stations_count', models.PositiveIntegerField(verbose_name='Aggregated Weather Stations Count')),
+            ],
+            options={
+                'db_table': 'national_month_rollup',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='NationalYearRollup',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('year', models.PositiveIntegerField(verbose_name='Rollup Corresponding Year')),
+                ('avg_max_temp', models.FloatField(null=True, verbose_name='Average Maximum Temperature per Year')),
+                ('avg_min_temp', models.FloatField(null=True, verbose_name='Average Minimum Temperature per Year')),
+                ('total_precipitation', models.FloatField(null=True, verbose_name='Average Station Total Precipitation per Year')),
+                ('stations_count', models.PositiveIntegerField(verbose_name='Aggregated Weather Stations Count')),
+            ],
+            options={
+                'db_table': 'national_year_rollup',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='StationMonthRollup',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('year', models.PositiveIntegerField(verbose_name='Rollup Corresponding Year')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Rollup Corresponding Month')),
+                ('avg_max_temp', models.FloatField(null=True, verbose_name='Average Maximum Temperature per Month')),
+                ('avg_min_temp', models.FloatField(null=True, verbose_name='Average Minimum Temperature per Month')),
+                ('total_precipitation', models.FloatField(null=True, verbose_name='Total Precipitation per Month')),
+                ('records_count', models.PositiveIntegerField(verbose_name='Aggregated Weather Records Count')),
+            ],
+            options={
+                'db_table': 'station_month_rollup',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_rollup_relations, drop_rollup_relations),
+    ]
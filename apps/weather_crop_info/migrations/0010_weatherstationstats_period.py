@@ -0,0 +1,70 @@
+# Generated by Django 4.1.6 on 2026-10-18 18:36
+
+from django.db import migrations, models
+
+# national_year_rollup query as of this migration, averaging yearly stats only.
+NATIONAL_YEAR_ROLLUP_QUERY = """
+    SELECT year AS id, year,
+           AVG(avg_max_temp) AS avg_max_temp, AVG(avg_min_temp) AS avg_min_temp,
+           AVG(total_precipitation) AS total_precipitation, COUNT(*) AS stations_count
+    FROM weather_station_stats
+    WHERE period = 'year'
+    GROUP BY year
+"""
+
+
+def recreate_national_year_rollup(apps, schema_editor, query=NATIONAL_YEAR_ROLLUP_QUERY):
+    """
+        Recreates national_year_rollup relation over the yearly stats, as
+        the stats now hold every period of the year.
+    """
+    connection = schema_editor.connection
+    kind = 'MATERIALIZED VIEW' if connection.vendor == 'postgresql' else 'TABLE'
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP {kind} IF EXISTS national_year_rollup")
+        cursor.execute(f"CREATE {kind} national_year_rollup AS {query}")
+        cursor.execute("CREATE UNIQUE INDEX national_year_rollup_key ON national_year_rollup (year)")
+
+
+def restore_national_year_rollup(apps, schema_editor):
+    recreate_national_year_rollup(apps, schema_editor, NATIONAL_YEAR_ROLLUP_QUERY.replace(
+        "WHERE period = 'year'", ""))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_crop_info', '0009_rollups'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='weatherstationstats',
+            name='unique_station_year_constraint',
+        ),
+        migrations.AddField(
+            model_name='weatherstationstats',
+            name='period',
+            field=models.CharField(default='year', max_length=50, verbose_name='Station Stats Period within the Year'),
+        ),
+        migrations.AlterField(
+            model_name='weatherstationstats',
+            name='avg_max_temp',
+            field=models.FloatField(null=True, verbose_name='Avergae Maximum Temperature per Period'),
+        ),
+        migrations.AlterField(
+            model_name='weatherstationstats',
+            name='avg_min_temp',
+            field=models.FloatField(null=True, verbose_name='Average Minimum Temperature per Period'),
+        ),
+        migrations.AlterField(
+            model_name='weatherstationstats',
+            name='total_precipitation',
+            field=models.FloatField(null=True, verbose_name='Total Precipitation per Period'),
+        ),
+        migrations.AddConstraint(
+            model_name='weatherstationstats',
+            constraint=models.UniqueConstraint(fields=('weather_station', 'year', 'period'), name='unique_station_year_period_constraint'),
+        ),
+        migrations.RunPython(recreate_national_year_rollup, restore_national_year_rollup),
+    ]
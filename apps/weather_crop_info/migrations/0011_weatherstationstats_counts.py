@@ -0,0 +1,33 @@
+# Generated by Django 4.1.6 on 2026-10-18 18:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_crop_info', '0010_weatherstationstats_period'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weatherstationstats',
+            name='is_complete',
+            field=models.BooleanField(default=False, verbose_name='Every Metric within the Missing Data Threshold'),
+        ),
+        migrations.AddField(
+            model_name='weatherstationstats',
+            name='max_temp_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Days with a Maximum Temperature'),
+        ),
+        migrations.AddField(
+            model_name='weatherstationstats',
+            name='min_temp_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Days with a Minimum Temperature'),
+        ),
+        migrations.AddField(
+            model_name='weatherstationstats',
+            name='precipitation_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Days with a Precipitation'),
+        ),
+    ]
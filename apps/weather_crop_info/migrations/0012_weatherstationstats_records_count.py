@@ -0,0 +1,82 @@
+# Generated by Django 4.1.6 on 2026-10-18 21:12
+
+from django.db import migrations, models
+
+# rollup queries as of this migration, station_month_rollup reading the monthly stats.
+STATION_MONTH_ROLLUP_QUERY = """
+    SELECT weather_station_id * 1000000 + year * 100 + CAST(SUBSTR(period, 7, 2) AS INTEGER) AS id,
+           weather_station_id, year, CAST(SUBSTR(period, 7, 2) AS INTEGER) AS month,
+           avg_max_temp, avg_min_temp, total_precipitation, records_count
+    FROM weather_station_stats
+    WHERE SUBSTR(period, 1, 6) = 'month_'
+"""
+
+NATIONAL_MONTH_ROLLUP_QUERY = """
+    SELECT year * 100 + month AS id, year, month,
+           AVG(avg_max_temp) AS avg_max_temp, AVG(avg_min_temp) AS avg_min_temp,
+           AVG(total_precipitation) AS total_precipitation, COUNT(*) AS stations_count
+    FROM station_month_rollup
+    GROUP BY year, month
+"""
+
+# station_month_rollup query of 0009_rollups, aggregating the weather records.
+RECORD_DATE_PARTS = {
+    'postgresql': {
+        'year': "CAST(EXTRACT(YEAR FROM date AT TIME ZONE 'UTC') AS INTEGER)",
+        'month': "CAST(EXTRACT(MONTH FROM date AT TIME ZONE 'UTC') AS INTEGER)",
+    },
+    'default': {
+        'year': "CAST(strftime('%Y', date) AS INTEGER)",
+        'month': "CAST(strftime('%m', date) AS INTEGER)",
+    },
+}
+
+PREVIOUS_STATION_MONTH_ROLLUP_QUERY = """
+    SELECT weather_station_id * 1000000 + {year} * 100 + {month} AS id,
+           weather_station_id, {year} AS year, {month} AS month,
+           AVG(max_temp) AS avg_max_temp, AVG(min_temp) AS avg_min_temp,
+           SUM(precipitation) AS total_precipitation, COUNT(*) AS records_count
+    FROM weather_record
+    GROUP BY weather_station_id, {year}, {month}
+"""
+
+
+def recreate_month_rollups(apps, schema_editor, station_month_query=STATION_MONTH_ROLLUP_QUERY):
+    """
+        Recreates station_month_rollup relation over the monthly stats, and
+        national_month_rollup depending on it, so that refreshing them no
+        longer scans the weather records.
+    """
+    connection = schema_editor.connection
+    kind = 'MATERIALIZED VIEW' if connection.vendor == 'postgresql' else 'TABLE'
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP {kind} IF EXISTS national_month_rollup")
+        cursor.execute(f"DROP {kind} IF EXISTS station_month_rollup")
+        cursor.execute(f"CREATE {kind} station_month_rollup AS {station_month_query}")
+        cursor.execute("CREATE UNIQUE INDEX station_month_rollup_key "
+                       "ON station_month_rollup (weather_station_id, year, month)")
+        cursor.execute(f"CREATE {kind} national_month_rollup AS {NATIONAL_MONTH_ROLLUP_QUERY}")
+        cursor.execute("CREATE UNIQUE INDEX national_month_rollup_key "
+                       "ON national_month_rollup (year, month)")
+
+
+def restore_month_rollups(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    recreate_month_rollups(apps, schema_editor, PREVIOUS_STATION_MONTH_ROLLUP_QUERY.format(
+        **RECORD_DATE_PARTS.get(vendor, RECORD_DATE_PARTS['default'])))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_crop_info', '0011_weatherstationstats_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weatherstationstats',
+            name='records_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Days with a Weather Record'),
+        ),
+        migrations.RunPython(recreate_month_rollups, restore_month_rollups),
+    ]
@@ -5,6 +5,8 @@
 """
 from django.db import models
 
+from .periods import YEAR_PERIOD
+
 
 class WeatherStation(models.Model):
     """
@@ -41,8 +43,11 @@ class WeatherRecord(models.Model):
         TODO: 
             * Move the row metadata information to a abstract model to avoid redundancy.
     """
+    # the unique (weather_station, date) constraint below already serves
+    # station lookups and station year aggregation.
     weather_station = models.ForeignKey(
-        WeatherStation, on_delete=models.CASCADE, verbose_name="Application Generated Station Reference")
+        WeatherStation, on_delete=models.CASCADE, db_index=False,
+        verbose_name="Application Generated Station Reference")
     date = models.DateTimeField(verbose_name="Weather Record Generated Date")
     min_temp = models.FloatField(null=True, verbose_name="Minimum Temperature")
     max_temp = models.FloatField(null=True, verbose_name="Maximum Temperature")
@@ -64,6 +69,10 @@ class WeatherRecord(models.Model):
                 fields=['weather_station', 'date'], name='unique_station_date_constraint'
             )
         ]
+        indexes = [
+            # date lookups across every station.
+            models.Index(fields=['date'], name='record_date_index'),
+        ]
 
 
 class CropYieldRecord(models.Model):
@@ -94,24 +103,177 @@ class CropYieldRecord(models.Model):
 
 class WeatherStationStats(models.Model):
     """
-        This model stores the statistical information of weather stations per year basis.
-        Currently, enforces unique constraint on weather staion and date combination.
+        This model stores the statistical information of weather stations per year basis,
+        for the whole year and for the periods within the year (see periods module).
+        Every metric is calculated over its own observations, counted along, and
+        stats missing too many observations are flagged incomplete.
+        Currently, enforces unique constraint on weather staion, year and period combination.
     """
     weather_station = models.ForeignKey(
         WeatherStation, on_delete=models.CASCADE, verbose_name="Application Generated Station Reference")
     year = models.PositiveIntegerField(
         verbose_name="Station Stats Corresponding Year")
     avg_max_temp = models.FloatField(
-        null=True, verbose_name="Avergae Maximum Temperature per Year")
+        null=True, verbose_name="Avergae Maximum Temperature per Period")
     avg_min_temp = models.FloatField(
-        null=True, verbose_name="Average Minimum Temperature per Year")
+        null=True, verbose_name="Average Minimum Temperature per Period")
     total_precipitation = models.FloatField(
-        null=True, verbose_name="Total Precipitation per Year")
+        null=True, verbose_name="Total Precipitation per Period")
+    period = models.CharField(
+        max_length=50, default=YEAR_PERIOD, verbose_name="Station Stats Period within the Year")
+    max_temp_count = models.PositiveIntegerField(
+        default=0, verbose_name="Days with a Maximum Temperature")
+    min_temp_count = models.PositiveIntegerField(
+        default=0, verbose_name="Days with a Minimum Temperature")
+    precipitation_count = models.PositiveIntegerField(
+        default=0, verbose_name="Days with a Precipitation")
+    records_count = models.PositiveIntegerField(
+        default=0, verbose_name="Days with a Weather Record")
+    is_complete = models.BooleanField(
+        default=False, verbose_name="Every Metric within the Missing Data Threshold")
 
     class Meta:
         db_table = 'weather_station_stats'
         constraints = [
             models.UniqueConstraint(
-                fields=['weather_station', 'year'], name='unique_station_year_constraint'
+                fields=['weather_station', 'year', 'period'], name='unique_station_year_period_constraint'
+            )
+        ]
+
+
+class WeatherIngestionLedger(models.Model):
+    """
+        This model stores the ingestion watermark of every weather station file.
+        Size, modification time and content hash describe the part of the file
+        that has already been ingested, so that unchanged files are skipped and
+        appended files are ingested from the previous watermark onwards.
+    """
+    file_name = models.CharField(
+        unique=True, max_length=200, verbose_name="Ingested File Name")
+    file_size = models.PositiveBigIntegerField(
+        verbose_name="Ingested File Size in Bytes")
+    file_mtime = models.FloatField(
+        verbose_name="Ingested File Modification Time")
+    content_hash = models.CharField(
+        max_length=64, verbose_name="SHA-256 of the Ingested File Content")
+    last_ingested_date = models.DateTimeField(
+        null=True, verbose_name="Last Ingested Weather Record Date")
+    create_timestamp = models.DateTimeField(
+        auto_now_add=True, verbose_name="Application Record Created Date")
+    update_timestamp = models.DateTimeField(
+        auto_now=True, verbose_name="Application Record Updated Date")
+
+    class Meta:
+        db_table = 'weather_ingestion_ledger'
+
+
+class WeatherStationStatsPending(models.Model):
+    """
+        This model stores the weather station and year combinations touched by the
+        ingestion scripts whose WeatherStationStats are yet to be recomputed.
+        Enforces unique constraint on weather station and year combination.
+    """
+    weather_station = models.ForeignKey(
+        WeatherStation, on_delete=models.CASCADE, verbose_name="Application Generated Station Reference")
+    year = models.PositiveIntegerField(
+        verbose_name="Touched Weather Records Corresponding Year")
+    create_timestamp = models.DateTimeField(
+        auto_now_add=True, verbose_name="Application Record Created Date")
+    update_timestamp = models.DateTimeField(
+        auto_now=True, verbose_name="Application Record Updated Date")
+
+    class Meta:
+        db_table = 'weather_station_stats_pending'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['weather_station', 'year'], name='unique_pending_station_year_constraint'
             )
         ]
+
+
+class DatasetGeneration(models.Model):
+    """
+        This model stores the generation of every cached dataset, bumped by the
+        scripts whenever they write the dataset. Cached responses are keyed by
+        the generation, so that they are invalidated exactly when the data
+        changes, whichever process wrote it.
+    """
+    name = models.CharField(
+        unique=True, max_length=200, verbose_name="Cached Dataset Name")
+    generation = models.PositiveBigIntegerField(
+        default=0, verbose_name="Dataset Generation")
+    update_timestamp = models.DateTimeField(
+        verbose_name="Dataset Last Written Date")
+
+    class Meta:
+        db_table = 'dataset_generation'
+
+
+class StationMonthRollup(models.Model):
+    """
+        This model reads the monthly weather statistics of every weather station,
+        from the monthly WeatherStationStats. Not managed by Django: backed by a
+        materialized view on PostgreSQL and by a plain table elsewhere, both
+        created by the migrations and refreshed by the rollups module.
+        The id is derived from the station, year and month.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    weather_station = models.ForeignKey(
+        WeatherStation, on_delete=models.DO_NOTHING, db_constraint=False,
+        verbose_name="Application Generated Station Reference")
+    year = models.PositiveIntegerField(verbose_name="Rollup Corresponding Year")
+    month = models.PositiveSmallIntegerField(verbose_name="Rollup Corresponding Month")
+    avg_max_temp = models.FloatField(
+        null=True, verbose_name="Average Maximum Temperature per Month")
+    avg_min_temp = models.FloatField(
+        null=True, verbose_name="Average Minimum Temperature per Month")
+    total_precipitation = models.FloatField(
+        null=True, verbose_name="Total Precipitation per Month")
+    records_count = models.PositiveIntegerField(verbose_name="Aggregated Weather Records Count")
+
+    class Meta:
+        managed = False
+        db_table = 'station_month_rollup'
+
+
+class NationalMonthRollup(models.Model):
+    """
+        This model reads the monthly weather statistics averaged over the weather
+        stations, aggregated from StationMonthRollup model. Not managed by Django,
+        see StationMonthRollup. The id is derived from the year and month.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    year = models.PositiveIntegerField(verbose_name="Rollup Corresponding Year")
+    month = models.PositiveSmallIntegerField(verbose_name="Rollup Corresponding Month")
+    avg_max_temp = models.FloatField(
+        null=True, verbose_name="Average Maximum Temperature per Month")
+    avg_min_temp = models.FloatField(
+        null=True, verbose_name="Average Minimum Temperature per Month")
+    total_precipitation = models.FloatField(
+        null=True, verbose_name="Average Station Total Precipitation per Month")
+    stations_count = models.PositiveIntegerField(verbose_name="Aggregated Weather Stations Count")
+
+    class Meta:
+        managed = False
+        db_table = 'national_month_rollup'
+
+
+class NationalYearRollup(models.Model):
+    """
+        This model reads the yearly weather statistics averaged over the weather
+        stations, aggregated from WeatherStationStats model. Not managed by Django,
+        see StationMonthRollup. The id is the year.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    year = models.PositiveIntegerField(verbose_name="Rollup Corresponding Year")
+    avg_max_temp = models.FloatField(
+        null=True, verbose_name="Average Maximum Temperature per Year")
+    avg_min_temp = models.FloatField(
+        null=True, verbose_name="Average Minimum Temperature per Year")
+    total_precipitation = models.FloatField(
+        null=True, verbose_name="Average Station Total Precipitation per Year")
+    stations_count = models.PositiveIntegerField(verbose_name="Aggregated Weather Stations Count")
+
+    class Meta:
+        managed = False
+        db_table = 'national_year_rollup'
@@ -0,0 +1,362 @@
+"""
+    This module contains paginators for weather_crop_info app.
+
+    Author: Chandrahas Reddy Mandapati
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections import OrderedDict
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import InvalidPage
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.timezone import is_naive
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class ApproximateCountPaginator(DjangoPaginator):
+    """
+        Django Paginator sparing the exact count of large unfiltered
+        querysets. Their count is the planner estimate of the table
+        (pg_class.reltuples) on PostgreSQL, or an exact count cached for
+        PAGINATION_COUNT_CACHE_TIMEOUT seconds on other databases or when the
+        table has not been analyzed yet. Such counts are flagged approximate.
+        Filtered querysets and tables below PAGINATION_APPROXIMATE_COUNT_THRESHOLD
+        records are always counted exactly.
+
+        A count already known, e.g. from the aggregate computing the ETag of
+        the page, may be passed instead so that it is not queried again.
+        Lookups always applied by a view, e.g. the default period of the
+        stats, may be passed as unfiltered_lookups: querysets filtered on
+        those only are estimated as unfiltered ones, from the planner
+        estimate of the lookups.
+    """
+
+    def __init__(self, object_list, per_page, count=None, unfiltered_lookups=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.approximate = False
+        self.unfiltered_lookups = unfiltered_lookups or {}
+        if count is not None:
+            self.__dict__['count'] = count
+
+    def is_filtered(self):
+        """
+            Whether the queryset is filtered beyond the unfiltered_lookups.
+
+            Returns:
+                Boolean: True when the queryset has to be counted exactly.
+        """
+        queryset = self.object_list
+        if not self.unfiltered_lookups:
+            return bool(queryset.query.where)
+        return queryset.query.where != queryset.model._default_manager.filter(
+            **self.unfiltered_lookups).query.where
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if self.is_filtered():
+            return queryset.count()
+
+        threshold = getattr(settings, 'PAGINATION_APPROXIMATE_COUNT_THRESHOLD', 100000)
+        estimate = estimated_count(queryset, self.unfiltered_lookups)
+        if estimate is not None:
+            if estimate < threshold:
+                return queryset.count()
+            self.approximate = True
+            return estimate
+
+        key = ':'.join(['approximate_count', queryset.model._meta.db_table, *(
+            f'{lookup}={value}' for lookup, value in sorted(self.unfiltered_lookups.items()))])
+        count = cache.get(key)
+        if count is not None:
+            self.approximate = True
+            return count
+        count = queryset.count()
+        if count >= threshold:
+            cache.set(key, count, getattr(settings, 'PAGINATION_COUNT_CACHE_TIMEOUT', 300))
+        return count
+
+    async def acount(self):
+        """
+            Async counterpart of count. Filtered querysets are counted with
+            QuerySet.acount, the estimate and the cache of unfiltered ones
+            are looked up in a thread.
+
+            Returns:
+                int: records count.
+        """
+        if 'count' in self.__dict__:
+            return self.count
+        if self.is_filtered():
+            self.__dict__['count'] = await self.object_list.acount()
+            return self.count
+        return await sync_to_async(getattr)(self, 'count')
+
+
+def estimated_count(queryset, lookups=None):
+    """
+        Planner estimate of the number of records of a model table, or of
+        the records matching some lookups.
+
+        Args:
+        queryset (QuerySet): queryset of the model.
+        lookups (dict): field lookups, the whole table when empty.
+
+        Returns:
+            int: estimated records count, None when not available.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                       [connection.ops.quote_name(queryset.model._meta.db_table)])
+        row = cursor.fetchone()
+        # reltuples is negative until the table is first analyzed.
+        if row is None or row[0] < 0:
+            return None
+        if not lookups:
+            return int(row[0])
+
+        sql, params = queryset.model._default_manager.filter(**lookups).query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class ApproximateCountPagination(PageNumberPagination):
+    """
+        PageNumberPagination with ApproximateCountPaginator. The views return
+        bare lists, the count is sent along in the X-Total-Count and
+        X-Total-Count-Approximate headers.
+    """
+    django_paginator_class = ApproximateCountPaginator
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+            Async counterpart of paginate_queryset, for async views. The
+            count and the page are fetched with the async queryset api.
+        """
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        await paginator.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)))
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.request = request
+        return [record async for record in self.page.object_list]
+
+    def get_count_headers(self):
+        """
+            Count headers of the current page.
+
+            Returns:
+                dict: response headers.
+        """
+        paginator = self.page.paginator
+        return {
+            'X-Total-Count': str(paginator.count),
+            'X-Total-Count-Approximate': 'true' if paginator.approximate else 'false',
+        }
+
+
+class KeysetPagination(BasePagination):
+    """
+        Keyset (cursor) pagination on a unique ordering. Unlike
+        PageNumberPagination, pages are located with a WHERE clause on the
+        last seen ordering values instead of an OFFSET, and no count query
+        is made, so the cost of a page does not depend on its depth.
+
+        The next and previous links carry an opaque cursor token encoding
+        the ordering values of the boundary row and the paging direction.
+    """
+    # unique ordering, last field first to break ties.
+    ordering = ('id',)
+    # ordering fields holding datetime values, encoded as ISO 8601 in tokens.
+    datetime_fields = ()
+    # ordering fields holding integer values.
+    integer_fields = ('id',)
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+            Returns a single page of the queryset, starting after (or
+            before, when paging backwards) the position in the cursor.
+        """
+        return self.page_rows(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+            Async counterpart of paginate_queryset, for async views.
+        """
+        return self.page_rows([row async for row in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        """
+            Queryset of the rows of the page located by the cursor, with
+            one extra row telling whether there is a page beyond this one.
+        """
+        self.base_url = request.build_absolute_uri()
+        self.position, self.reverse = self.decode_cursor(request)
+
+        if self.position is not None:
+            queryset = queryset.filter(self.keyset_filter(self.position, self.reverse))
+        order = [('-' if self.reverse else '') + field for field in self.ordering]
+        return queryset.order_by(*order)[:self.page_size + 1]
+
+    def page_rows(self, rows):
+        """
+            Trims the extra row of the fetched rows, restores their order and
+            sets the positions of the next and previous pages.
+        """
+        position, reverse = self.position, self.reverse
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        has_next = (not reverse and has_more) or (reverse and position is not None)
+        has_previous = (reverse and has_more) or (not reverse and position is not None)
+        self.next_position = self.row_position(rows[-1]) if has_next and rows else None
+        self.previous_position = self.row_position(rows[0]) if has_previous and rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.encode_cursor(self.next_position, False))
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.encode_cursor(self.previous_position, True))
+
+    def get_first_link(self):
+        return remove_query_param(self.base_url, self.cursor_query_param)
+
+    def keyset_filter(self, position, reverse):
+        """
+            Builds the WHERE clause selecting the rows strictly after (or
+            before) the position in the ordering, i.e. the expanded form of
+            the row comparison (a, b, c) > (x, y, z). The leading field is
+            also bounded on its own so that an index on it can be used.
+        """
+        lookup = 'lt' if reverse else 'gt'
+        keyset_filter = Q()
+        for index, field in enumerate(self.ordering):
+            equal_fields = {f: position[f] for f in self.ordering[:index]}
+            keyset_filter |= Q(**equal_fields, **{f'{field}__{lookup}': position[field]})
+        leading_field = self.ordering[0]
+        return Q(**{f'{leading_field}__{lookup}e': position[leading_field]}) & keyset_filter
+
+    def row_position(self, row):
+        """
+            Ordering values of a row, which may either be a model instance
+            or a dictionary produced by QuerySet.values().
+        """
+        if isinstance(row, dict):
+            return {field: row[field] for field in self.ordering}
+        return {field: getattr(row, field) for field in self.ordering}
+
+    def encode_cursor(self, position, reverse):
+        values = [value.isoformat() if field in self.datetime_fields else value
+                  for field, value in position.items()]
+        payload = json.dumps({'p': values, 'r': int(reverse)}, separators=(',', ':'))
+        return urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        """
+            Decodes the cursor query parameter.
+
+            Returns:
+                dict: ordering values of the boundary row, None on the first page.
+                bool: whether the page lies before the boundary row.
+        """
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+            values = payload['p']
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = {field: self.decode_value(field, value)
+                        for field, value in zip(self.ordering, values)}
+            return position, bool(payload['r'])
+        except (BinasciiError, KeyError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def decode_value(self, field, value):
+        """
+            Checks and converts an ordering value decoded from a cursor token,
+            so that tampered tokens never reach the queryset filter.
+
+            Raises:
+                ValueError: the value does not fit the field.
+        """
+        if field in self.datetime_fields:
+            value = datetime.fromisoformat(value)
+            if settings.USE_TZ and is_naive(value):
+                raise ValueError
+        elif field in self.integer_fields:
+            # the value must also fit the 64 bit integer columns.
+            if isinstance(value, bool) or not isinstance(value, (int, str)):
+                raise ValueError
+            value = int(value)
+            if not -2 ** 63 <= value < 2 ** 63:
+                raise ValueError
+        return value
+
+
+class WeatherRecordKeysetPagination(KeysetPagination):
+    """
+        Keyset pagination for WeatherRecordList, following the
+        (weather_station, date) unique constraint, with id as tie breaker.
+    """
+    ordering = ('weather_station_id', 'date', 'id')
+    datetime_fields = ('date',)
+    integer_fields = ('weather_station_id', 'id')
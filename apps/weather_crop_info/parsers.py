@@ -0,0 +1,262 @@
+"""
+    This module contains parsers for the raw data files ingested by
+    weather_crop_info app. Parsers are generators so that the ingestion
+    scripts never hold more than one batch of a file in memory.
+
+    The wx_data decoder relies on the fixed layout of the station files
+    (YYYYMMDD followed by three integer columns) instead of strptime, and
+    decodes the numeric columns of a whole chunk of lines at once. NumPy is
+    used for the numeric pass when it is installed, the standard library
+    otherwise.
+
+    Author: Chandrahas Reddy Mandapati
+"""
+import hashlib
+import os
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# value used by the wx_data files to represent missing data.
+MISSING_VALUE = -9999
+
+# number of lines decoded in one vectorized pass.
+CHUNK_SIZE = 1000
+
+# number of columns in a wx_data line: date, max_temp, min_temp, precipitation.
+WEATHER_COLUMNS = 4
+
+# number of bytes read at a time while hashing or scanning files.
+READ_SIZE = 1024 * 1024
+
+
+@lru_cache(maxsize=None)
+def decode_month(year_month):
+    """
+        Cached lookup from a YYYYMM integer to its year and month.
+        Raises ValueError on an impossible month.
+
+        Args:
+        year_month (int): date in YYYYMM format.
+
+        Returns:
+            tuple: (year, month).
+    """
+    year, month = divmod(year_month, 100)
+    if not 1 <= month <= 12:
+        raise ValueError(f"month must be in 1..12, got {year_month}")
+    return year, month
+
+
+def decode_date(value):
+    """
+        Converts a YYYYMMDD integer into a datetime without strptime.
+        Equivalent to datetime.strptime(str(value), '%Y%m%d').
+
+        Args:
+        value (int): date in YYYYMMDD format.
+
+        Returns:
+            datetime: decoded date.
+    """
+    year_month, day = divmod(value, 100)
+    return datetime(*decode_month(year_month), day)
+
+
+def _decode_numbers(lines, use_numpy):
+    """
+        Decodes every integer of a chunk of lines in a single pass.
+
+        Args:
+        lines (list): raw wx_data lines.
+        use_numpy (Boolean): use NumPy for the numeric pass.
+
+        Returns:
+            list: flat list of python ints, WEATHER_COLUMNS per line.
+    """
+    text = "".join(lines)
+    if use_numpy:
+        try:
+            values = np.fromstring(text, dtype=np.int64, sep=" ")
+        except ValueError:
+            values = None
+        if values is not None and values.size == len(lines) * WEATHER_COLUMNS:
+            return values.tolist()
+    values = list(map(int, text.split()))
+    if len(values) != len(lines) * WEATHER_COLUMNS:
+        raise ValueError("malformed weather record line")
+    return values
+
+
+def decode_weather_lines(lines, use_numpy=None):
+    """
+        Decodes a chunk of wx_data lines.
+
+        Args:
+        lines (list): raw wx_data lines.
+        use_numpy (Boolean): force the NumPy (True) or the standard library
+            (False) numeric pass. Defaults to NumPy when it is installed.
+
+        Returns:
+            list: tuples of (date, min_temp, max_temp, precipitation) with
+            missing values converted to None.
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    values = _decode_numbers(lines, use_numpy)
+
+    def value_or_none(value):
+        return None if value == MISSING_VALUE else float(value)
+
+    return [
+        (decode_date(date), value_or_none(min_temp), value_or_none(max_temp),
+         value_or_none(precip))
+        for date, max_temp, min_temp, precip in zip(*[iter(values)] * WEATHER_COLUMNS)
+    ]
+
+
+def read_lines(file_path, offset=0, size=None):
+    """
+        Lazily reads the lines of a file between two byte positions.
+
+        Args:
+        file_path (String): path to the file.
+        offset (int): byte position of the first line to be read.
+        size (int): byte position where reading stops, end of file when None.
+
+        Yields:
+            String: next line of the file.
+    """
+    with open(file_path, "rb") as file:
+        file.seek(offset)
+        position = offset
+        for line in file:
+            if size is not None and position >= size:
+                break
+            position += len(line)
+            yield line.decode()
+
+
+def parse_weather_records(file_path, use_numpy=None, offset=0, size=None):
+    """
+        Lazily parses a weather station file, one chunk of lines at a time.
+
+        Args:
+        file_path (String): path to a wx_data station file.
+        use_numpy (Boolean): see decode_weather_lines.
+        offset (int): byte position of the first line to be parsed.
+        size (int): byte position where parsing stops, end of file when None.
+
+        Yields:
+            tuple: (date, min_temp, max_temp, precipitation) with missing
+            values converted to None.
+    """
+    for lines in batched(read_lines(file_path, offset, size), CHUNK_SIZE):
+        yield from decode_weather_lines(lines, use_numpy)
+
+
+def file_years(file_path, offset=0, size=None):
+    """
+        Years of the lines of a weather station file, read from the leading
+        YYYY of every line without decoding the rest of it.
+
+        Args:
+        file_path (String): path to a wx_data station file.
+        offset (int): byte position of the first line to be read.
+        size (int): byte position where reading stops, end of file when None.
+
+        Returns:
+            set: years of the lines.
+    """
+    return {int(year) for year in {line[:4] for line in read_lines(file_path, offset, size)}}
+
+
+def complete_lines_size(file_path):
+    """
+        Size of a file up to and including its last newline, so that a line
+        still being written is never considered ingested.
+
+        Args:
+        file_path (String): path to the file.
+
+        Returns:
+            int: size in bytes.
+    """
+    with open(file_path, "rb") as file:
+        position = file.seek(0, os.SEEK_END)
+        while position > 0:
+            read_size = min(READ_SIZE, position)
+            position -= read_size
+            file.seek(position)
+            newline = file.read(read_size).rfind(b"\n")
+            if newline != -1:
+                return position + newline + 1
+    return 0
+
+
+def file_digests(file_path, boundary, size):
+    """
+        SHA-256 digests of the first boundary bytes and the first size bytes
+        of a file, computed in a single read.
+
+        Args:
+        file_path (String): path to the file.
+        boundary (int): size of the prefix whose digest is also returned.
+        size (int): number of bytes to be hashed.
+
+        Returns:
+            String: hex digest of the first boundary bytes, None when the
+            boundary lies beyond size.
+            String: hex digest of the first size bytes.
+    """
+    hasher = hashlib.sha256()
+    boundary_digest = hasher.hexdigest() if boundary == 0 else None
+    position = 0
+    with open(file_path, "rb") as file:
+        while position < size:
+            chunk = file.read(min(READ_SIZE, size - position))
+            if not chunk:
+                break
+            if position < boundary <= position + len(chunk):
+                hasher.update(chunk[:boundary - position])
+                boundary_digest = hasher.hexdigest()
+                hasher.update(chunk[boundary - position:])
+            else:
+                hasher.update(chunk)
+            position += len(chunk)
+    return boundary_digest, hasher.hexdigest()
+
+
+def list_files(directory):
+    """
+        Lists the data files of a directory.
+
+        Args:
+        directory (String): directory path, such as WEATHER_DATA_DIR setting.
+
+        Returns:
+            list: file paths.
+    """
+    return [os.path.join(directory, f) for f in os.listdir(directory)
+            if os.path.isfile(os.path.join(directory, f))]
+
+
+def batched(iterable, batch_size):
+    """
+        Splits an iterable into lists of at most batch_size items.
+
+        Args:
+        iterable (Iterable): items to be split.
+        batch_size (int): maximum size of a batch.
+
+        Yields:
+            list: next batch of items.
+    """
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
@@ -0,0 +1,217 @@
+"""
+    This module maintains the yearly partitions of weather_record table of
+    weather_crop_info app, partitioned by range of date on PostgreSQL by
+    weather_record_partitions script. WeatherRecord model is unaware of it:
+    rows are written to and read from weather_record, and routed to the
+    partition of their year.
+
+    Partitions are created as the ingestion meets new years, and old years
+    can be detached into plain tables without rewriting any row. Records of
+    years without a partition, e.g. written through the ORM elsewhere, land
+    in the default partition until their year gets one.
+
+    Author: Chandrahas Reddy Mandapati
+"""
+from django.db import connections, transaction
+
+from .models import WeatherRecord
+
+
+def year_partition_name(year):
+    """
+        Table name of the partition of a year.
+
+        Args:
+        year (int): year of the weather records.
+
+        Returns:
+            String: table name.
+    """
+    return f"{WeatherRecord._meta.db_table}_y{year}"
+
+
+def default_partition_name():
+    """
+        Table name of the default partition, holding the records of the years
+        without a partition.
+
+        Returns:
+            String: table name.
+    """
+    return f"{WeatherRecord._meta.db_table}_default"
+
+
+def year_partitions(using='default'):
+    """
+        Partitions of weather_record table, by year.
+
+        Args:
+        using (String): database alias.
+
+        Returns:
+            dict: year to table name, None when weather_record is not partitioned.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+
+    table = WeatherRecord._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT partition.relname
+            FROM pg_partitioned_table
+            LEFT JOIN pg_inherits ON pg_inherits.inhparent = pg_partitioned_table.partrelid
+            LEFT JOIN pg_class partition ON partition.oid = pg_inherits.inhrelid
+            WHERE pg_partitioned_table.partrelid = to_regclass(%s)""", [table])
+        rows = cursor.fetchall()
+
+    if not rows:
+        return None
+    return {int(name[len(table) + 2:]): name for name, in rows
+            if name is not None and name != default_partition_name()}
+
+
+def rebuild_weather_record(partitioned, using='default'):
+    """
+        Rebuilds weather_record table, partitioned by range of date with a
+        partition per year and a default one, or back into a single table.
+        Rows are copied before the constraints and indexes, which keep their
+        names, are recreated. Nothing else may depend on the table: the
+        rollups read the weather station stats only.
+
+        Args:
+        partitioned (Boolean): partition the table, or merge its partitions.
+        using (String): database alias.
+
+        Returns:
+            Boolean: whether the table was rebuilt, False when already as requested.
+
+        Raises:
+            ValueError: the database is not PostgreSQL.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        raise ValueError("weather_record can only be partitioned on PostgreSQL")
+    if (year_partitions(using) is not None) == partitioned:
+        return False
+
+    table = WeatherRecord._meta.db_table
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute("SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+                       "WHERE conrelid = to_regclass(%s)", [table])
+        constraints = cursor.fetchall()
+        cursor.execute("SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() "
+                       "AND tablename = %s AND NOT indexname = ANY(%s)",
+                       [table, [name for name, _, _ in constraints]])
+        indexes = [indexdef for indexdef, in cursor.fetchall()]
+
+        # pending deferred foreign key checks would prevent dropping the table.
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_previous")
+        cursor.execute(f"""
+            CREATE TABLE {table} (
+                LIKE {table}_previous INCLUDING DEFAULTS INCLUDING IDENTITY
+            ) {'PARTITION BY RANGE (date)' if partitioned else ''}""")
+
+        if partitioned:
+            # records of years without a partition land in the default one.
+            cursor.execute(f"CREATE TABLE {default_partition_name()} PARTITION OF {table} DEFAULT")
+            cursor.execute(f"SELECT EXTRACT(YEAR FROM MIN(date) AT TIME ZONE 'UTC'), "
+                           f"EXTRACT(YEAR FROM MAX(date) AT TIME ZONE 'UTC') FROM {table}_previous")
+            first_year, last_year = cursor.fetchone()
+            for year in range(int(first_year or 0), int(last_year or -1) + 1):
+                cursor.execute(
+                    f"CREATE TABLE {year_partition_name(year)} PARTITION OF {table} "
+                    f"FOR VALUES FROM (%s) TO (%s)",
+                    [f"{year}-01-01 00:00:00+00", f"{year + 1}-01-01 00:00:00+00"])
+
+        cursor.execute(f"INSERT INTO {table} OVERRIDING SYSTEM VALUE SELECT * FROM {table}_previous")
+        cursor.execute(f"DROP TABLE {table}_previous")
+
+        # unique constraints of a partitioned table must include the date.
+        for name, kind, definition in constraints:
+            if kind == 'p':
+                definition = 'PRIMARY KEY (id, date)' if partitioned else 'PRIMARY KEY (id)'
+            cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+        for indexdef in indexes:
+            cursor.execute(indexdef)
+        cursor.execute(f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                       f"COALESCE(MAX(id), 0) + 1, false) FROM {table}", [table])
+        cursor.execute(f"ANALYZE {table}")
+    return True
+
+
+def ensure_year_partitions(years, using='default'):
+    """
+        Creates the missing partitions of the given years, when weather_record
+        is partitioned. Invoked by the ingestion once per file, before and
+        outside of the transaction writing its records.
+
+        A partition is created as a plain table, filled with the records of
+        its year moved out of the default partition, and then attached. Until
+        this short transaction ends, it locks weather_record against concurrent
+        partitioning only and the default partition, normally empty, against
+        any access, instead of weather_record against every read and write.
+        Concurrent ingestions are serialized by an advisory lock.
+
+        Args:
+        years (Iterable): years of the records about to be written.
+        using (String): database alias.
+
+        Returns:
+            list: years whose partition was created.
+    """
+    years = set(years)
+    partitions = year_partitions(using)
+    if partitions is None or years <= partitions.keys():
+        return []
+
+    table = WeatherRecord._meta.db_table
+    created_years = []
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [table])
+        # another ingestion may have created them meanwhile.
+        for year in sorted(years - year_partitions(using).keys()):
+            name = year_partition_name(year)
+            bounds = [f"{year}-01-01 00:00:00+00", f"{year + 1}-01-01 00:00:00+00"]
+            cursor.execute(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)")
+            cursor.execute("SELECT to_regclass(%s)", [default_partition_name()])
+            if cursor.fetchone()[0] is not None:
+                cursor.execute(f"""
+                    WITH moved AS (
+                        DELETE FROM {default_partition_name()} WHERE date >= %s AND date < %s
+                        RETURNING *
+                    )
+                    INSERT INTO {name} SELECT * FROM moved""", bounds)
+            cursor.execute(
+                f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+                bounds)
+            created_years.append(year)
+    return created_years
+
+
+def detach_year_partition(year, using='default'):
+    """
+        Detaches the partition of a year from weather_record, e.g. to archive
+        or drop it. The partition is kept as a plain table of the same name,
+        its records are no longer part of WeatherRecord model.
+
+        Args:
+        year (int): year of the partition.
+        using (String): database alias.
+
+        Returns:
+            String: table name of the detached partition.
+
+        Raises:
+            ValueError: weather_record is not partitioned or has no
+                partition for the year.
+    """
+    partitions = year_partitions(using)
+    if not partitions or year not in partitions:
+        raise ValueError(f"No weather_record partition for the year {year}")
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"ALTER TABLE {WeatherRecord._meta.db_table} DETACH PARTITION {partitions[year]}")
+    return partitions[year]
@@ -0,0 +1,103 @@
+"""
+    This module contains the periods of the weather station stats of
+    weather_crop_info app. Besides the whole year, stats are calculated for
+    every month and for the day windows configured in WEATHER_STATS_PERIODS
+    setting, e.g. the growing season.
+
+    Author: Chandrahas Reddy Mandapati
+"""
+from calendar import isleap, monthrange
+from datetime import date
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+
+# period of the yearly stats, the default one of the stats api.
+YEAR_PERIOD = 'year'
+
+# period of every month, by name.
+MONTH_PERIODS = {f'month_{month:02}': month for month in range(1, 13)}
+
+
+def period_windows():
+    """
+        Day windows configured in WEATHER_STATS_PERIODS setting. Windows
+        must lie within a year, as the stats of a period belong to a year.
+
+        Returns:
+            dict: period name to ((start month, start day), (end month, end day)),
+                both days inclusive.
+
+        Raises:
+            ImproperlyConfigured: on a window overlapping two years or
+                named as a builtin period.
+    """
+    windows = getattr(settings, 'WEATHER_STATS_PERIODS', {})
+    for name, (start, end) in windows.items():
+        if name == YEAR_PERIOD or name in MONTH_PERIODS:
+            raise ImproperlyConfigured(f"WEATHER_STATS_PERIODS: {name} is a builtin period")
+        if tuple(start) > tuple(end):
+            raise ImproperlyConfigured(f"WEATHER_STATS_PERIODS: {name} overlaps two years")
+    return windows
+
+
+def period_names():
+    """
+        Names of every period of the weather station stats.
+
+        Returns:
+            tuple: period names.
+    """
+    return (YEAR_PERIOD, *MONTH_PERIODS, *period_windows())
+
+
+def month_period(month):
+    """
+        Period of a month.
+
+        Args:
+        month (int): month, from 1 to 12.
+
+        Returns:
+            String: period name.
+    """
+    return f'month_{month:02}'
+
+
+def window_filters():
+    """
+        Filters selecting the weather records of every day window within a
+        year.
+
+        Returns:
+            dict: period name to Q on WeatherRecord model.
+    """
+    return {
+        name: (
+            Q(date__month__gt=start_month) | Q(date__month=start_month, date__day__gte=start_day)
+        ) & (
+            Q(date__month__lt=end_month) | Q(date__month=end_month, date__day__lte=end_day)
+        )
+        for name, ((start_month, start_day), (end_month, end_day)) in period_windows().items()
+    }
+
+
+def period_days(period, year):
+    """
+        Number of days of a period in a year, i.e. the number of observations
+        expected of a weather station.
+
+        Args:
+        period (String): one of period_names().
+        year (int): year of the period.
+
+        Returns:
+            int: number of days.
+    """
+    if period == YEAR_PERIOD:
+        return 366 if isleap(year) else 365
+    if period in MONTH_PERIODS:
+        return monthrange(year, MONTH_PERIODS[period])[1]
+    start, end = period_windows()[period]
+    return (date(year, *end) - date(year, *start)).days + 1
@@ -0,0 +1,61 @@
+"""
+    This module maintains the weather rollups of weather_crop_info app, i.e.
+    StationMonthRollup, NationalMonthRollup and NationalYearRollup models,
+    read from the monthly and yearly weather station stats, so that they are
+    refreshed without scanning the weather records.
+    On PostgreSQL the rollups are materialized views, refreshed concurrently
+    so that the apis keep reading the previous rollups meanwhile. Other
+    databases keep them in plain tables, rebuilt within a transaction. Both
+    are created by the migrations, which must follow any change of ROLLUPS.
+
+    Author: Chandrahas Reddy Mandapati
+"""
+from django.db import connections, transaction
+
+# rollup queries by table, in refresh order, along with their unique key.
+# monthly stats periods are named month_01 to month_12, see periods module.
+ROLLUPS = {
+    'station_month_rollup': ("""
+        SELECT weather_station_id * 1000000 + year * 100 + CAST(SUBSTR(period, 7, 2) AS INTEGER) AS id,
+               weather_station_id, year, CAST(SUBSTR(period, 7, 2) AS INTEGER) AS month,
+               avg_max_temp, avg_min_temp, total_precipitation, records_count
+        FROM weather_station_stats
+        WHERE SUBSTR(period, 1, 6) = 'month_'
+    """, ('weather_station_id', 'year', 'month')),
+    'national_month_rollup': ("""
+        SELECT year * 100 + month AS id, year, month,
+               AVG(avg_max_temp) AS avg_max_temp, AVG(avg_min_temp) AS avg_min_temp,
+               AVG(total_precipitation) AS total_precipitation, COUNT(*) AS stations_count
+        FROM station_month_rollup
+        GROUP BY year, month
+    """, ('year', 'month')),
+    'national_year_rollup': ("""
+        SELECT year AS id, year,
+               AVG(avg_max_temp) AS avg_max_temp, AVG(avg_min_temp) AS avg_min_temp,
+               AVG(total_precipitation) AS total_precipitation, COUNT(*) AS stations_count
+        FROM weather_station_stats
+        WHERE period = 'year'
+        GROUP BY year
+    """, ('year',)),
+}
+
+
+def refresh_rollups(using='default'):
+    """
+        Refreshes the rollups from the weather station stats. Invoked after
+        the stats are written.
+
+        Args:
+        using (String): database alias.
+
+        Returns:
+            None.
+    """
+    connection = connections[using]
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        for table in ROLLUPS:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {table}")
+            else:
+                cursor.execute(f"DELETE FROM {table}")
+                cursor.execute(f"INSERT INTO {table} {ROLLUPS[table][0]}")
@@ -0,0 +1,118 @@
+"""
+    This module is a django script used to load test the list apis at high
+    concurrency, comparing the sync views served over WSGI with their async
+    counterparts served over ASGI. Both servers are started beforehand, e.g.
+
+        python manage.py runserver 8000
+        uvicorn django_project.asgi:application --port 8001 --workers 1
+
+    and every url is then hit with the same number of requests, by the same
+    number of concurrent clients.
+
+    Dependencies:
+        * a WSGI server and an ASGI server serving the project.
+"""
+from urllib.parse import urlsplit
+import asyncio
+import time
+
+# urls hit by default, a sync api over WSGI against its async api over ASGI.
+DEFAULT_URLS = {
+    "wsgi": "http://127.0.0.1:8000/weather-crop-info/v1/api/weather",
+    "asgi": "http://127.0.0.1:8001/weather-crop-info/v1/async/api/weather",
+}
+
+
+async def fetch(url):
+    """
+        Sends a single GET request, on a connection of its own.
+
+        Args:
+        url (String): requested url.
+
+        Returns:
+            int: response status code.
+    """
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n\
+Connection: close\r\n\r\n".encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return int(status_line.split()[1])
+
+
+async def load(url, concurrency, requests_count):
+    """
+        Hits a url with requests_count requests, concurrency at a time.
+
+        Args:
+        url (String): requested url.
+        concurrency (int): number of concurrent clients.
+        requests_count (int): total number of requests.
+
+        Returns:
+            dict: requests per second, latency percentiles and failures.
+    """
+    remaining = iter(range(requests_count))
+    latencies = []
+    failures = 0
+
+    async def client():
+        nonlocal failures
+        for _ in remaining:
+            start_time = time.monotonic()
+            try:
+                status = await fetch(url)
+            except OSError:
+                status = None
+            latencies.append(time.monotonic() - start_time)
+            if status != 200:
+                failures += 1
+
+    start_time = time.monotonic()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    seconds = time.monotonic() - start_time
+
+    latencies.sort()
+    return {
+        "rps": requests_count / seconds,
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[int(len(latencies) * 0.99)],
+        "failures": failures,
+    }
+
+
+def run(*args):
+    """
+        This function is the starting point of script execution. Invoked
+        automatically by the runscript.
+
+        Args:
+            wsgi=<url>: url of the sync api, served over WSGI.
+            asgi=<url>: url of the async api, served over ASGI.
+            concurrency=<n>: number of concurrent clients, 200 by default.
+            requests=<n>: number of requests per url, 2000 by default.
+
+        Returns:
+            None.
+    """
+    urls = dict(DEFAULT_URLS)
+    concurrency, requests_count = 200, 2000
+    for arg in args:
+        name, _, value = arg.partition('=')
+        if name in urls:
+            urls[name] = value
+        elif name == 'concurrency':
+            concurrency = int(value)
+        elif name == 'requests':
+            requests_count = int(value)
+
+    for name, url in urls.items():
+        result = asyncio.run(load(url, concurrency, requests_count))
+        print(f"{name:<5} {result['rps']:8.1f} requests/second  p50 {result['p50']:6.3f} seconds\
+  p99 {result['p99']:6.3f} seconds  {result['failures']} failures  {url}")
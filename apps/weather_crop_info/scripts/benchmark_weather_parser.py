@@ -0,0 +1,71 @@
+"""
+    This module is a django script used to benchmark the wx_data decoder
+    against the previous per-line strptime based parse.
+
+    Dependencies:
+        * parsers module of weather_crop_info app.
+"""
+from apps.weather_crop_info import parsers
+from datetime import datetime
+from django.conf import settings
+from timeit import timeit
+
+
+def legacy_parse(file_path):
+    """
+        The per-line parse used by ingest_weather_records before the
+        fixed-layout decoder. Kept as the benchmark reference.
+
+        Args:
+        file_path (String): path to a wx_data station file.
+
+        Returns:
+            list: tuples of (date, min_temp, max_temp, precipitation).
+    """
+    records = []
+    with open(file_path, "r") as file:
+        for record in file:
+            date, max_temp, min_temp, precip = record.strip().split("\t")
+            records.append((
+                datetime.strptime(date, '%Y%m%d'),
+                None if int(min_temp) == -9999 else float(min_temp),
+                None if int(max_temp) == -9999 else float(max_temp),
+                None if int(precip) == -9999 else float(precip),
+            ))
+    return records
+
+
+def run(*args):
+    """
+        This function is the starting point of script execution. Invoked
+        automatically by the runscript.
+
+        Args:
+            Accepts station file paths, defaults to every file in
+            WEATHER_DATA_DIR setting.
+
+        Returns:
+            None.
+    """
+    files = list(args) or parsers.list_files(settings.WEATHER_DATA_DIR)
+
+    candidates = {
+        "legacy strptime": legacy_parse,
+        "decoder (stdlib)": lambda file: list(parsers.parse_weather_records(file, use_numpy=False)),
+    }
+    if parsers.np is not None:
+        candidates["decoder (numpy)"] = lambda file: list(
+            parsers.parse_weather_records(file, use_numpy=True))
+
+    # every candidate must produce exactly the same records.
+    expected = legacy_parse(files[0])
+    for name, parse in candidates.items():
+        assert parse(files[0]) == expected, f"{name} output differs from the legacy parse"
+
+    lines_count = sum(len(legacy_parse(file)) for file in files)
+    baseline = None
+    for name, parse in candidates.items():
+        seconds = timeit(lambda: [parse(file) for file in files], number=1)
+        baseline = baseline or seconds
+        print(f"{name:<18} {seconds:8.3f} seconds {int(lines_count / seconds):>10} lines/second\
+ {baseline / seconds:6.2f}x")
@@ -0,0 +1,166 @@
+"""
+    This module is a django script used to benchmark the weather_record
+    indexes against the access paths of the apis and the stats script. The
+    queries are planned and timed twice: once with the indexes of
+    WeatherRecord model, i.e. record_date_index, temporarily dropped inside
+    a transaction which is then rolled back, and once with the indexes in
+    place. The foreign key index on weather_station, dropped by the
+    migrations, is missing from both passes. The stats queries are served
+    by the unique (weather_station, date) constraint, kept in both passes,
+    and act as a control. Dropping the indexes locks
+    weather_record for the duration of that pass, hence the script is not
+    meant for a live database.
+
+    Dependencies:
+        * indexes of WeatherRecord model.
+        * calculate_weather_station_stats script.
+"""
+from apps.weather_crop_info.loaders import copy_weather_records
+from apps.weather_crop_info.models import WeatherRecord, WeatherStation
+from apps.weather_crop_info.parsers import batched
+from apps.weather_crop_info.scripts.calculate_weather_station_stats import \
+    weather_station_stats_query
+from datetime import datetime, timedelta
+from django.db import connection, transaction
+from django.utils.timezone import make_aware
+import time
+
+# prefix of the synthetic weather stations created by the generate argument.
+SYNTHETIC_STATION_PREFIX = "BENCH"
+
+# years of daily records generated for every synthetic weather station.
+SYNTHETIC_YEARS = range(1985, 2015)
+
+
+def generate_weather_records(stations_count):
+    """
+        Creates synthetic weather stations with daily weather records over
+        SYNTHETIC_YEARS, about 11000 records per station.
+
+        Args:
+        stations_count (int): number of synthetic weather stations.
+
+        Returns:
+            int: Created records count.
+    """
+    start_time = datetime.now()
+    stations = WeatherStation.objects.bulk_create([
+        WeatherStation(station_id=station_id, station_name=station_id,
+                       create_by="benchmark_weather_record_indexes_script",
+                       update_by="benchmark_weather_record_indexes_script")
+        for station_id in (f"{SYNTHETIC_STATION_PREFIX}{index:07}" for index in range(stations_count))
+    ], ignore_conflicts=True)
+    station_ids = list(WeatherStation.objects.filter(
+        station_id__in=[station.station_id for station in stations]).values_list('id', flat=True))
+
+    first_date = make_aware(datetime(SYNTHETIC_YEARS[0], 1, 1))
+    days = (make_aware(datetime(SYNTHETIC_YEARS[-1] + 1, 1, 1)) - first_date).days
+    rows = (
+        (weather_station_id, first_date + timedelta(days=day),
+         float(day % 300 - 150), float(day % 300 - 50), float(day % 17))
+        for weather_station_id in station_ids for day in range(days)
+    )
+
+    created_records_count = 0
+    if connection.vendor == 'postgresql':
+        created_records_count = copy_weather_records(rows, author="benchmark_weather_record_indexes_script")
+    else:
+        for batch in batched(rows, 10000):
+            created_records_count += len(WeatherRecord.objects.bulk_create([
+                WeatherRecord(weather_station_id=weather_station_id, date=date, min_temp=min_temp,
+                              max_temp=max_temp, precipitation=precipitation,
+                              create_by="benchmark_weather_record_indexes_script",
+                              update_by="benchmark_weather_record_indexes_script")
+                for weather_station_id, date, min_temp, max_temp, precipitation in batch
+            ], ignore_conflicts=True))
+
+    print(f"Generated {created_records_count} weather records over {len(station_ids)} stations\
+ in {(datetime.now() - start_time).total_seconds()} seconds")
+    return created_records_count
+
+
+def benchmark_queries():
+    """
+        The queries matching the access paths served by the indexes.
+
+        Returns:
+            dict: query name to QuerySet.
+    """
+    station_ids = list(WeatherStation.objects.order_by(
+        'station_id').values_list('id', flat=True)[:50])
+    return {
+        "date lookup": WeatherRecord.objects.filter(date=make_aware(datetime(1995, 6, 1))),
+        "station years stats": weather_station_stats_query(
+            [(weather_station_id, year) for weather_station_id in station_ids
+             for year in range(1990, 1995)]),
+        "full stats": weather_station_stats_query(),
+    }
+
+
+def measure(queries, repeat=3):
+    """
+        Prints the plan and the best of repeat timings of every query.
+
+        Args:
+        queries (dict): query name to QuerySet.
+        repeat (int): number of timed executions of every query.
+
+        Returns:
+            dict: query name to seconds.
+    """
+    timings = {}
+    options = {'analyze': True} if connection.vendor == 'postgresql' else {}
+    for name, queryset in queries.items():
+        print(f"--- {name}\n{queryset.explain(**options)}")
+        seconds = []
+        for _ in range(repeat):
+            start_time = time.monotonic()
+            list(queryset.all())
+            seconds.append(time.monotonic() - start_time)
+        timings[name] = min(seconds)
+    return timings
+
+
+def run(*args):
+    """
+        This function is the starting point of script execution. Invoked
+        automatically by the runscript.
+
+        Args:
+            generate=<n>: create n synthetic weather stations beforehand.
+            cleanup: delete the synthetic weather stations and their records.
+
+        Returns:
+            None.
+    """
+    for arg in args:
+        if arg.startswith('generate='):
+            generate_weather_records(int(arg.split('=', 1)[1]))
+
+    # fresh planner statistics, and no dead tuples left by generate, so that
+    # both passes are planned from the same row estimates.
+    with connection.cursor() as cursor:
+        cursor.execute("VACUUM ANALYZE weather_record" if connection.vendor == 'postgresql'
+                       else "ANALYZE weather_record")
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            for index in WeatherRecord._meta.indexes:
+                cursor.execute(f"DROP INDEX {index.name}")
+        print("===== without indexes")
+        before = measure(benchmark_queries())
+        transaction.set_rollback(True)
+
+    print("===== with indexes")
+    after = measure(benchmark_queries())
+
+    # the foreign key index on weather_station was dropped by the migrations
+    # in favour of the unique constraint, it is missing from both passes.
+    print(f"===== {', '.join(index.name for index in WeatherRecord._meta.indexes)} dropped -> in place,\
+ the dropped weather_station foreign key index is missing from both passes")
+    for name in before:
+        print(f"{name:<20} {before[name]:10.3f} seconds -> {after[name]:10.3f} seconds\
+ {before[name] / after[name] if after[name] else 0:8.2f}x")
+
+    if 'cleanup' in args:
+        WeatherStation.objects.filter(station_id__startswith=SYNTHETIC_STATION_PREFIX).delete()
@@ -1,22 +1,161 @@
 """
     This module is a django script used to update captured weather statistics
-    from WeatherRecord model to WeatherStationStats model.
+    from WeatherRecord model to WeatherStationStats model, for every year and
+    every period of the year.
 
     Dependencies:
         * Update "test_weather_station_stats" test in tests.py for
         every new functionality or updated functionality.
         * ingest_weather_records script will be affected on change.
+        * cached WeatherStationStatsList pages are invalidated on every write.
+        * the weather rollups are refreshed after the stats are written.
 """
-from apps.weather_crop_info.models import WeatherStationStats, WeatherRecord
-from django.db.models import Avg, Sum
-from django.db.models import F
+from apps.weather_crop_info.caching import STATS_DATASET, bump_generation
+from apps.weather_crop_info.models import (WeatherRecord, WeatherStationStats,
+                                           WeatherStationStatsPending)
+from apps.weather_crop_info.parsers import batched
+from apps.weather_crop_info.periods import (YEAR_PERIOD, month_period, period_days,
+                                            period_windows, window_filters)
+from apps.weather_crop_info.rollups import refresh_rollups
+from django.conf import settings
+from django.db.models import BooleanField, Count, ExpressionWrapper, Sum
+from django.db.models import F, Q
+from django.utils import timezone
+from collections import Counter, defaultdict
 from datetime import datetime
+from functools import reduce
+from operator import or_
 
+# number of station years recomputed by a single aggregate query.
+STATION_YEARS_BATCH_SIZE = 5000
 
-def update_weather_station_stats(update_conflicts=False):
+# number of pending flags cleared by a single delete query.
+PENDING_DELETE_BATCH_SIZE = 250
+
+# weather record fields summed up by the statistics.
+STATS_FIELDS = ('max_temp', 'min_temp', 'precipitation')
+
+
+def station_years_filter(station_years):
+    """
+        Builds a filter matching the weather records of the given station
+        years. Consecutive years of a station are merged into a single date
+        range so that the unique (weather_station, date) index can be used
+        with as few ranges as possible.
+
+        Args:
+        station_years (Iterable): (weather_station_id, year) tuples.
+
+        Returns:
+            Q: filter on WeatherRecord model.
+    """
+    tzinfo = timezone.get_current_timezone()
+    ranges = []
+    for weather_station_id, year in sorted(set(station_years)):
+        if ranges and ranges[-1][0] == weather_station_id and ranges[-1][2] == year:
+            ranges[-1][2] = year + 1
+        else:
+            ranges.append([weather_station_id, year, year + 1])
+
+    # the station list keeps the planner on the unique index, rather than on
+    # the date index over every station.
+    return Q(weather_station_id__in=sorted({station[0] for station in ranges})) & reduce(or_, (
+        Q(weather_station_id=weather_station_id,
+          date__gte=datetime(start_year, 1, 1, tzinfo=tzinfo),
+          date__lt=datetime(end_year, 1, 1, tzinfo=tzinfo))
+        for weather_station_id, start_year, end_year in ranges
+    ), Q(pk__in=[]))
+
+
+def weather_station_stats_query(station_years=None):
+    """
+        Builds the aggregate query calculating, in a single pass over the
+        WeatherRecord model, the partial statistics (sums and counts) of
+        every bucket of weather records sharing weather station, year, month
+        and membership of the day windows. The statistics of every period of
+        the year are then combined from the buckets by weather_station_stats().
+
+        Args:
+        station_years (Iterable): (weather_station_id, year) tuples to restrict
+            the calculation to. Every station year is calculated when None.
+
+        Returns:
+            QuerySet: dictionaries of the bucket and its partial statistics.
+    """
+    records = WeatherRecord.objects.all()
+    if station_years is not None:
+        records = records.filter(station_years_filter(station_years))
+
+    windows = {
+        f"window_{index}": ExpressionWrapper(window_filter, output_field=BooleanField())
+        for index, window_filter in enumerate(window_filters().values())
+    }
+
+    # extract the statistical information directly from the WeatherRecord model,
+    # every metric is aggregated over its own non missing observations.
+    return records.values(
+        'weather_station',
+        year=F('date__year'),
+        month=F('date__month'),
+        **windows
+    ).annotate(
+        **{f"{field}_sum": Sum(field) for field in STATS_FIELDS},
+        **{f"{field}_count": Count(field) for field in STATS_FIELDS},
+        records_count=Count('pk'),
+    )
+
+
+def weather_station_stats(buckets):
+    """
+        Combines the partial statistics of weather_station_stats_query buckets
+        into the statistics of every period having weather records, flagged
+        complete when every metric misses at most the fraction of the days of
+        the period set in WEATHER_STATS_MISSING_DATA_THRESHOLD setting.
+
+        Args:
+        buckets (Iterable): rows of weather_station_stats_query.
+
+        Returns:
+            Generator: WeatherStationStats values of every station, year and period.
     """
-        Calculates weather station statistics for every year from the
-        WeatherRecord model and update them into WeatherStationStats model.
+    windows = list(period_windows())
+    threshold = getattr(settings, 'WEATHER_STATS_MISSING_DATA_THRESHOLD', 0.1)
+    partials = defaultdict(lambda: defaultdict(Counter))
+    for bucket in buckets:
+        periods = [YEAR_PERIOD, month_period(bucket["month"]), *(
+            name for index, name in enumerate(windows) if bucket[f"window_{index}"])]
+        for period in periods:
+            partial = partials[bucket["weather_station"], bucket["year"]][period]
+            for field in STATS_FIELDS:
+                partial[f"{field}_sum"] += bucket[f"{field}_sum"] or 0
+                partial[f"{field}_count"] += bucket[f"{field}_count"]
+            partial["records_count"] += bucket["records_count"]
+
+    for (weather_station_id, year), periods in partials.items():
+        for period, partial in periods.items():
+            average = {field: partial[f"{field}_sum"] / partial[f"{field}_count"]
+                       if partial[f"{field}_count"] else None for field in STATS_FIELDS}
+            required_count = period_days(period, year) * (1 - threshold)
+            yield {
+                "weather_station_id": weather_station_id,
+                "year": year,
+                "period": period,
+                "avg_max_temp": average["max_temp"],
+                "avg_min_temp": average["min_temp"],
+                "total_precipitation": partial["precipitation_sum"]
+                if partial["precipitation_count"] else None,
+                **{f"{field}_count": partial[f"{field}_count"] for field in STATS_FIELDS},
+                "records_count": partial["records_count"],
+                "is_complete": all(partial[f"{field}_count"] >= required_count
+                                   for field in STATS_FIELDS),
+            }
+
+
+def update_weather_station_stats(update_conflicts=False, station_years=None):
+    """
+        Calculates weather station statistics for every year and every period
+        of the year from the WeatherRecord model and update them into
+        WeatherStationStats model.
         Ensures that only records to be created are created, records are updated
         otherwise.
 
@@ -24,36 +163,18 @@ def update_weather_station_stats(update_conflicts=False):
         check the documentation for compatibility when trying to update the DB.
 
         Args:
-            Accepts No Args.
+        update_conflicts (Boolean): update the stats on unique constraint violation.
+        station_years (Iterable): (weather_station_id, year) tuples to restrict
+            the calculation to. Every station year is calculated when None.
 
         Returns:
-            None.
+            int: Inserted/Updated stats records count.
     """
     start_time = datetime.now()
 
     try:
-        # extract the statistical information directly from the WeatherRecord model
-        records = WeatherRecord.objects.values(
-            'weather_station',
-            year=F('date__year')
-        ).annotate(
-            avg_max_temp=Avg('max_temp'),
-            avg_min_temp=Avg('min_temp'),
-            total_precipitation=Sum('precipitation'),
-        ).exclude(
-            max_temp__isnull=True,
-            min_temp__isnull=True,
-            precipitation__isnull=True
-        )
-
-        records = [
-            {
-                "weather_station_id": record.get("weather_station"),
-                **record,
-            }
-            for record in records
-        ]
-        [record.pop("weather_station") for record in records]
+        records = list(weather_station_stats(
+            weather_station_stats_query(station_years)))
 
         if update_conflicts:
             # create all the records in bulk (for better performance).
@@ -62,9 +183,10 @@ def update_weather_station_stats(update_conflicts=False):
             created_records = WeatherStationStats.objects.bulk_create(
                 [WeatherStationStats(**values) for values in records],
                 update_conflicts=True,
-                unique_fields=['weather_station', 'year'],
-                update_fields=["avg_min_temp",
-                               "avg_max_temp", "total_precipitation"],
+                unique_fields=['weather_station', 'year', 'period'],
+                update_fields=["avg_min_temp", "avg_max_temp", "total_precipitation",
+                               "max_temp_count", "min_temp_count", "precipitation_count",
+                               "records_count", "is_complete"],
                 batch_size=1000)
         else:
             # Incase if update to the existing records is not desired
@@ -73,23 +195,100 @@ def update_weather_station_stats(update_conflicts=False):
                 ignore_conflicts=True,
                 batch_size=1000)
 
+        # invalidates the cached stats api pages.
+        bump_generation(STATS_DATASET)
+
         print(f"Inserted {len(created_records)} new weather station stats records\
             in {(datetime.now() - start_time).total_seconds()} seconds")
+        return len(created_records)
     except Exception as err:
         print(
             f"Encountered exception while calculating Stats")
         raise err
 
 
+def update_pending_weather_station_stats(station_ids=None):
+    """
+        Recalculates the statistics of only the station years flagged by the
+        ingestion scripts in WeatherStationStatsPending model, so that the
+        refresh time scales with the size of the change rather than with the
+        size of the history. Flags are cleared once their stats are upserted,
+        unless they were raised again in the meantime.
+
+        Args:
+        station_ids (list): real world station references to restrict the
+            recalculation to. Every flagged station is recalculated when None.
+
+        Returns:
+            int: Inserted/Updated stats records count.
+    """
+    start_time = timezone.now()
+    pending = WeatherStationStatsPending.objects.all()
+    if station_ids is not None:
+        pending = pending.filter(weather_station__station_id__in=station_ids)
+    pending = list(pending.values_list(
+        'id', 'update_timestamp', 'weather_station_id', 'year'))
+
+    updated_records_count = 0
+    if station_ids is None and \
+            len(pending) * 2 >= WeatherStationStats.objects.filter(period=YEAR_PERIOD).count():
+        # when most station years are flagged, a single full pass is cheaper.
+        updated_records_count += update_weather_station_stats(
+            update_conflicts=True)
+    else:
+        for batch in batched(pending, STATION_YEARS_BATCH_SIZE):
+            updated_records_count += update_weather_station_stats(
+                update_conflicts=True,
+                station_years=[(weather_station_id, year) for _, _, weather_station_id, year in batch])
+
+    # a flag raised again since it was read keeps its newer update_timestamp.
+    for batch in batched(pending, PENDING_DELETE_BATCH_SIZE):
+        WeatherStationStatsPending.objects.filter(reduce(or_, (
+            Q(pk=pk, update_timestamp=update_timestamp) for pk, update_timestamp, _, _ in batch
+        ))).delete()
+
+    print(f"Recalculated stats of {len(pending)} pending station years\
+        in {(timezone.now() - start_time).total_seconds()} seconds")
+    return updated_records_count
+
+
+def update_weather_rollups():
+    """
+        Refreshes the weather rollups from the WeatherStationStats model,
+        concurrently with their readers on
+        PostgreSQL. Invoked once the stats are written.
+
+        Returns:
+            None.
+    """
+    start_time = timezone.now()
+    refresh_rollups()
+    print(f"Refreshed weather rollups\
+        in {(timezone.now() - start_time).total_seconds()} seconds")
+
+
 def run(*args):
     """
         This function is the starting point of script execution. Invoked
         automatically by the runscript.
 
         Args:
-            Accepts no arguments.
+            full_rebuild: recalculate every station year instead of only the
+            ones flagged by the ingestion scripts.
+            update_conflicts: update the stats on unique constraint violation,
+            only applicable along with full_rebuild.
 
         Returns:
             None.
     """
-    update_weather_station_stats(True if 'update_conflicts' in args else False)
+    if 'full_rebuild' in args:
+        start_time = timezone.now()
+        update_weather_station_stats(
+            True if 'update_conflicts' in args else False)
+        if 'update_conflicts' in args:
+            # every flagged station year has just been recalculated.
+            WeatherStationStatsPending.objects.filter(
+                update_timestamp__lte=start_time).delete()
+    else:
+        update_pending_weather_station_stats()
+    update_weather_rollups()
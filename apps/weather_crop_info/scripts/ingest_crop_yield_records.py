@@ -7,15 +7,10 @@
         every new functionality or updated functionality.
 """
 from apps.weather_crop_info.models import CropYieldRecord
+from apps.weather_crop_info.parsers import list_files
+from apps.weather_crop_info.workers import pool_size_arg, process_files
 from datetime import datetime
-from os import listdir
-from os.path import isfile, join
 from django.conf import settings
-from itertools import repeat
-import multiprocessing as mp
-
-# Need this for MacOS version since the default process start method has changed to 'spawn' from 'fork'
-mp.set_start_method('fork', force=True)
 
 
 def file_handler(file_path, update_conflicts=False):
@@ -78,13 +73,33 @@ def file_handler(file_path, update_conflicts=False):
         raise err
 
 
+def ingest_crop_yield_files(files, update_conflicts=False, pool_size=None):
+    """
+        Ingests the crop yield files parallely, largest file first.
+
+        Args:
+        files (list): crop yield file paths.
+        update_conflicts (Boolean): update the records on unique constraint violation.
+        pool_size (int): number of worker processes, see workers.pool_size.
+
+        Returns:
+            int: Inserted/Updated records count.
+    """
+    # building function arguments to be assigned to process in pool
+    pool_args = [[file, update_conflicts] for file in files]
+
+    # process all the files parallely for faster execution.
+    return sum(process_files(file_handler, pool_args, requested_size=pool_size))
+
+
 def run(*args):
     """
         This function is the starting point of script execution. Invoked
         automatically by the runscript.
 
         Args:
-            Accepts no arguments.
+            update_conflicts: update the records on unique constraint violation.
+            pool_size=<n>: number of worker processes.
 
         Returns:
             None.
@@ -92,17 +107,10 @@ def run(*args):
     start_time = datetime.now()
 
     # extract all the files in the folder set in settings.
-    files = [join(settings.CROP_YIELD_DATA_DIR, f)
-             for f in listdir(settings.CROP_YIELD_DATA_DIR) if isfile(
-        join(settings.CROP_YIELD_DATA_DIR, f))]
+    files = list_files(settings.CROP_YIELD_DATA_DIR)
 
-    # building function arguments to be assigned to process in pool
-    pool_args = [[file, True if 'update_conflicts' in args else False]
-                 for file in files]
-
-    # process all the files parallely for faster execution.
-    with mp.Pool(5) as pool:
-        inserted_records_counts = pool.starmap(file_handler, pool_args)
+    inserted_records_count = ingest_crop_yield_files(
+        files, True if 'update_conflicts' in args else False, pool_size_arg(args))
     print(
-        f"Finally updated {sum(inserted_records_counts)} new records in \
+        f"Finally updated {inserted_records_count} new records in \
         {(datetime.now() - start_time).total_seconds()} seconds")
@@ -6,20 +6,31 @@
         * Update "test_weather_station_stats" test in tests.py for
         every new functionality or updated functionality.
         * ingest_weather_records script will be affected on change.
+        * calculate_weather_station_stats script consumes the station years
+        flagged in WeatherStationStatsPending model.
 """
-from apps.weather_crop_info.models import WeatherStation, WeatherRecord
+from apps.weather_crop_info.loaders import (COPY_LOADER, copy_weather_records,
+                                            resolve_loader)
+from apps.weather_crop_info.models import (WeatherIngestionLedger, WeatherRecord,
+                                           WeatherStation, WeatherStationStatsPending)
+from apps.weather_crop_info.partitions import ensure_year_partitions, year_partitions
+from apps.weather_crop_info.workers import pool_size_arg, process_files
+from apps.weather_crop_info.parsers import (batched, complete_lines_size,
+                                            file_digests, file_years, list_files,
+                                            parse_weather_records)
 from datetime import datetime
-from os import listdir
-from os.path import isfile, join
+from django.db import transaction
+from django.db.models import Max
 from django.conf import settings
 from pathlib import Path
-import multiprocessing as mp
+import os
 
-# Need this for MacOS version since the default process start method has changed to 'spawn' from 'fork'
-mp.set_start_method('fork', force=True)
+# number of records parsed, held in memory and written at a time.
+BATCH_SIZE = 1000
 
 
-def file_handler(file_path, update_conflicts=False):
+def file_handler(file_path, update_conflicts=False, use_copy=False, incremental=False,
+                 weather_station_id=None, partition_years=None):
     """
         A file handler that reads the weather information from the text file
         and updates the WeatherRecord model. Ensures that only records to be 
@@ -27,9 +38,25 @@ def file_handler(file_path, update_conflicts=False):
 
         This implementation is made compatible with PostgreSQL. One might have to
         check the documentation for compatibility when trying to update the DB.
+        When use_copy is set and the database is PostgreSQL, the records are
+        streamed with COPY into a staging table and merged from there.
+
+        Every ingested file is recorded in the WeatherIngestionLedger model.
+        When incremental is set, the ledger is consulted first: unchanged files
+        are skipped and files that only grew are ingested from the previous
+        watermark onwards. Any other change re-ingests the whole file.
 
         Args:
         file_path (String): file path related to BASE_DIR setting.
+        update_conflicts (Boolean): update the records on unique constraint violation.
+        use_copy (Boolean): use the COPY loader when the database supports it.
+        incremental (Boolean): skip the already ingested part of the file.
+        weather_station_id (int): primary key of the file's WeatherStation, as
+            returned by upsert_weather_stations. Looked up or created when None.
+        partition_years (Collection): years having a weather_record partition,
+            as read once per run by ingest_weather_files. None when weather_record
+            is not partitioned, records of new years then land in the default
+            partition, if any.
 
         Returns:
             int: Newly created records count.
@@ -42,86 +69,253 @@ def file_handler(file_path, update_conflicts=False):
         # this represents the weather station
         file_name = Path(file_path).stem
 
+        # compare the file against the ledger before touching anything else.
+        ledger = WeatherIngestionLedger.objects.filter(
+            file_name=file_name).first() if incremental else None
+        file_mtime = os.stat(file_path).st_mtime
+        file_size = complete_lines_size(file_path)
+        if ledger and (ledger.file_size, ledger.file_mtime) == (file_size, file_mtime):
+            print(f"Skipped unchanged file {file_path}")
+            return 0
+
+        # a matching digest of the ingested prefix means only new lines were appended.
+        ledger_digest, content_hash = file_digests(
+            file_path, ledger.file_size if ledger else 0, file_size)
+        offset = ledger.file_size if ledger and ledger_digest == ledger.content_hash else 0
+
         # create the weather station record if one doesnt exists
-        weather_station, created = WeatherStation.objects.get_or_create(
-            station_id=file_name,
-            station_name=file_name,
-            create_by="ingest_weather_records_script",
-            update_by="ingest_weather_records_script",
-        )
-        records = []
-
-        # extract the records from the file
-        with open(file_path, "r") as file:
-            for record in file:
-                date, max_temp, min_temp, precip = record.strip().split("\t")
-                records.append(
-                    {
-                        "weather_station": weather_station,
-                        "date": datetime.strptime(date, '%Y%m%d'),
-                        "min_temp": None if int(min_temp) == -9999 else float(min_temp),
-                        "max_temp": None if int(max_temp) == -9999 else float(max_temp),
-                        "precipitation": None if int(precip) == -9999 else float(precip),
-                        "create_by": "ingest_weather_records_script",
-                        "update_by": "ingest_weather_records_script",
-                    }
-                )
-
-        if update_conflicts:
-            # create all the records in bulk (for better performance).
-            # The bulk_create with update_confilcts = True does a upsert operation.
-            # Only total_yield and update_by are updated on unique constraint violation.
-            created_records = WeatherRecord.objects.bulk_create(
-                [WeatherRecord(**values) for values in records],
+        if weather_station_id is None:
+            weather_station_id = upsert_weather_stations(
+                [file_name])[file_name]
+        # lazily parse the file, nothing but the current batch is held in memory.
+        touched_years = set()
+        records = track_years(parse_weather_records(
+            file_path, offset=offset, size=file_size), touched_years)
+        loader = resolve_loader(use_copy)
+
+        # new years get their weather_record partition upfront, in a short
+        # transaction of their own, so that the partition locks are never held
+        # along with the file transaction.
+        if partition_years is not None:
+            years = file_years(file_path, offset=offset, size=file_size)
+            if not years <= set(partition_years):
+                ensure_year_partitions(years)
+
+        # records and ledger are committed together.
+        with transaction.atomic():
+            if loader == COPY_LOADER:
+                # stream the parsed rows through COPY and merge them in one statement.
+                created_records_count = copy_weather_records(
+                    ((weather_station_id, *record) for record in records),
+                    update_conflicts=update_conflicts)
+            else:
+                created_records_count = 0
+                for batch in batched(records, BATCH_SIZE):
+                    created_records_count += write_weather_records(
+                        weather_station_id, batch, update_conflicts)
+
+            # flag the station years whose stats have to be recomputed.
+            WeatherStationStatsPending.objects.bulk_create(
+                [WeatherStationStatsPending(weather_station_id=weather_station_id, year=year)
+                 for year in touched_years],
                 update_conflicts=True,
-                unique_fields=['weather_station', 'date'],
-                update_fields=["min_temp", "max_temp",
-                               "precipitation", "update_by"],
-                batch_size=1000)
-        else:
-            # Incase if update to the existing records is not desired
-            created_records = WeatherRecord.objects.bulk_create(
-                [WeatherRecord(**values) for values in records],
-                ignore_conflicts=True,
-                batch_size=1000)
-
-        print(f"Inserted/Updated {len(created_records)} new records for the file {file_path}\
-            in {(datetime.now() - start_time).total_seconds()} seconds")
-        return len(created_records)
+                unique_fields=['weather_station', 'year'],
+                update_fields=['update_timestamp'])
+
+            WeatherIngestionLedger.objects.update_or_create(
+                file_name=file_name,
+                defaults={
+                    "file_size": file_size,
+                    "file_mtime": file_mtime,
+                    "content_hash": content_hash,
+                    "last_ingested_date": WeatherRecord.objects.filter(
+                        weather_station_id=weather_station_id).aggregate(date=Max('date'))['date'],
+                })
+
+        elapsed = (datetime.now() - start_time).total_seconds()
+        print(f"Inserted/Updated {created_records_count} new records for the file {file_path}\
+            {'from byte ' + str(offset) + ' ' if offset else ''}in {elapsed} seconds \
+            ({rows_per_second(created_records_count, elapsed)} rows/second, {loader} loader)")
+        return created_records_count
     except Exception as err:
         print(
             f"Encountered exception while operating on file {file_path}")
         raise err
 
 
+def upsert_weather_stations(station_ids):
+    """
+        Creates the missing WeatherStation records of the given real world
+        station references in a single statement. Existing stations are left
+        untouched, so that concurrent ingestions never race on the unique
+        station_id and station_name constraints.
+
+        Args:
+        station_ids (list): real world station references, the station file
+            names without extension.
+
+        Returns:
+            dict: station_id to WeatherStation primary key map.
+    """
+    WeatherStation.objects.bulk_create(
+        [WeatherStation(
+            station_id=station_id,
+            station_name=station_id,
+            create_by="ingest_weather_records_script",
+            update_by="ingest_weather_records_script",
+        ) for station_id in station_ids],
+        ignore_conflicts=True)
+    return dict(WeatherStation.objects.filter(
+        station_id__in=station_ids).values_list('station_id', 'id'))
+
+
+def track_years(records, years):
+    """
+        Passes parsed weather records through while collecting their years.
+
+        Args:
+        records (Iterable): tuples of (date, min_temp, max_temp, precipitation).
+        years (set): set the years are added to.
+
+        Yields:
+            tuple: the unchanged record.
+    """
+    for record in records:
+        years.add(record[0].year)
+        yield record
+
+
+def write_weather_records(weather_station_id, batch, update_conflicts=False):
+    """
+        Writes one batch of parsed weather records through the ORM.
+
+        Args:
+        weather_station_id (int): primary key of the station the records belong to.
+        batch (list): tuples of (date, min_temp, max_temp, precipitation).
+        update_conflicts (Boolean): update the records on unique constraint violation.
+
+        Returns:
+            int: Inserted/Updated records count.
+    """
+    weather_records = [
+        WeatherRecord(
+            weather_station_id=weather_station_id,
+            date=date,
+            min_temp=min_temp,
+            max_temp=max_temp,
+            precipitation=precipitation,
+            create_by="ingest_weather_records_script",
+            update_by="ingest_weather_records_script",
+        )
+        for date, min_temp, max_temp, precipitation in batch
+    ]
+    if update_conflicts:
+        # create all the records in bulk (for better performance).
+        # The bulk_create with update_confilcts = True does a upsert operation.
+        # Only min_temp, max_temp, precipitation, update_by and update_timestamp
+        # are updated on unique constraint violation. update_timestamp backs
+        # the ETag of WeatherRecordList.
+        created_records = WeatherRecord.objects.bulk_create(
+            weather_records,
+            update_conflicts=True,
+            unique_fields=['weather_station', 'date'],
+            update_fields=["min_temp", "max_temp",
+                           "precipitation", "update_by", "update_timestamp"],
+            batch_size=BATCH_SIZE)
+    else:
+        # Incase if update to the existing records is not desired
+        created_records = WeatherRecord.objects.bulk_create(
+            weather_records,
+            ignore_conflicts=True,
+            batch_size=BATCH_SIZE)
+    return len(created_records)
+
+
+def rows_per_second(rows, seconds):
+    """
+        Throughput helper used by the ingestion summaries.
+
+        Args:
+        rows (int): processed rows count.
+        seconds (float): elapsed time in seconds.
+
+        Returns:
+            int: rows per second, 0 when no time has elapsed.
+    """
+    return int(rows / seconds) if seconds else 0
+
+
+def ingest_weather_files(files, update_conflicts=False, use_copy=False, incremental=True,
+                         on_file_ingested=None, pool_size=None):
+    """
+        Ingests the weather station files parallely, largest file first.
+        Files are consumed in completion order, so that on_file_ingested is
+        invoked in this process as soon as the records of a file have been
+        committed.
+
+        Args:
+        files (list): weather station file paths.
+        update_conflicts (Boolean): update the records on unique constraint violation.
+        use_copy (Boolean): use the COPY loader when the database supports it.
+        incremental (Boolean): skip the already ingested part of the files.
+        on_file_ingested (Callable): invoked with the file path and its
+            Inserted/Updated records count.
+        pool_size (int): number of worker processes, see workers.pool_size.
+
+        Returns:
+            int: Inserted/Updated records count.
+    """
+    # create every missing station upfront, workers only receive primary keys.
+    weather_station_ids = upsert_weather_stations(
+        [Path(file).stem for file in files])
+
+    # the partitions are read once per run, workers only create the missing ones.
+    partitions = year_partitions()
+    partition_years = None if partitions is None else sorted(partitions)
+
+    # building function arguments to be assigned to process in pool
+    pool_args = [[file, update_conflicts, use_copy, incremental, weather_station_ids[Path(file).stem],
+                  partition_years]
+                 for file in files]
+
+    def on_result(args, records_count):
+        if on_file_ingested is not None:
+            on_file_ingested(args[0], records_count)
+
+    return sum(process_files(file_handler, pool_args, on_result, pool_size))
+
+
 def run(*args):
     """
         This function is the starting point of script execution. Invoked
         automatically by the runscript.
 
         Args:
-            Accepts no arguments.
+            update_conflicts: update the records on unique constraint violation.
+            copy: load the records through COPY on PostgreSQL.
+            ignore_ledger: re-ingest every file in full.
+            pool_size=<n>: number of worker processes.
 
         Returns:
             None.
     """
     start_time = datetime.now()
-    inserted_records_count = 0
+    use_copy = 'copy' in args
 
     # extract all the files in the folder set in settings.
-    files = [join(settings.WEATHER_DATA_DIR, f) for f in listdir(
-        settings.WEATHER_DATA_DIR) if isfile(join(settings.WEATHER_DATA_DIR, f))]
-
-    # building function arguments to be assigned to process in pool
-    pool_args = [[file, True if 'update_conflicts' in args else False]
-                 for file in files]
+    files = list_files(settings.WEATHER_DATA_DIR)
 
-    # process all the files parallely for faster execution.
-    # TODO: configure pool size dynamically.
-    with mp.Pool(5) as pool:
-        inserted_records_counts = pool.starmap(file_handler, pool_args)
+    # stats are refreshed by calculate_weather_station_stats script, or along
+    # with the ingestion by the run_ingestion_pipeline command.
+    inserted_records_count = ingest_weather_files(
+        files,
+        update_conflicts=True if 'update_conflicts' in args else False,
+        use_copy=use_copy,
+        incremental='ignore_ledger' not in args,
+        pool_size=pool_size_arg(args))
 
-    # TODO : invoke calculate_weather_station_stats script automatically.
+    elapsed = (datetime.now() - start_time).total_seconds()
     print(
-        f"Finally inserted {sum(inserted_records_counts)} new records in \
-            {(datetime.now() - start_time).total_seconds()} seconds")
+        f"Finally inserted {inserted_records_count} new records in \
+            {elapsed} seconds ({rows_per_second(inserted_records_count, elapsed)} rows/second, \
+            {resolve_loader(use_copy)} loader)")
@@ -0,0 +1,51 @@
+"""
+    This module is a django script used to partition weather_record table by
+    year on PostgreSQL, to list its yearly partitions, and to detach the
+    partitions of old years, e.g.
+
+        python manage.py runscript weather_record_partitions --script-args partition
+        python manage.py runscript weather_record_partitions --script-args detach=1985
+
+    Partitioning, and unpartitioning, rewrite the whole table within a single
+    transaction, to be run while nothing else writes weather records.
+    Detached partitions are kept as plain tables, to be archived or dropped.
+    Their weather records leave the apis at once, the stats and rollups
+    follow on their next full rebuild.
+
+    Dependencies:
+        * ingest_weather_records script creates the partitions of new years.
+"""
+from apps.weather_crop_info.partitions import (detach_year_partition, rebuild_weather_record,
+                                               year_partitions)
+from datetime import datetime
+
+
+def run(*args):
+    """
+        This function is the starting point of script execution. Invoked
+        automatically by the runscript.
+
+        Args:
+            partition: partition weather_record, a partition per year.
+            unpartition: merge the partitions back into a single table.
+            detach=<year>: detach the partition of the year, may be repeated.
+
+        Returns:
+            None.
+    """
+    if 'partition' in args or 'unpartition' in args:
+        start_time = datetime.now()
+        if rebuild_weather_record(partitioned='partition' in args):
+            print(f"Rebuilt weather_record in {(datetime.now() - start_time).total_seconds()} seconds")
+
+    for arg in args:
+        name, _, value = arg.partition('=')
+        if name == 'detach':
+            print(f"Detached {detach_year_partition(int(value))}")
+
+    partitions = year_partitions()
+    if partitions is None:
+        print("weather_record is not partitioned")
+        return
+    for year, table in sorted(partitions.items()):
+        print(f"{year} {table}")
@@ -3,36 +3,164 @@
 
     Author: Chandrahas Reddy Mandapati 
 """
+from django.db.models import F
 from rest_framework import serializers
 
-from .models import WeatherRecord, WeatherStationStats
 
+class ValuesSerializer(serializers.Serializer):
+    """
+        Read-only serializer of the dictionaries produced by QuerySet.values().
+        Fields are declared once on the class rather than introspected from
+        the model, and values() fetches exactly the serialized columns along
+        with the station reference, in a single joined query.
+    """
+
+    @classmethod
+    def values(cls, queryset, *extra_fields):
+        """
+            Restricts a queryset to the columns serialized by this serializer.
+
+            Args:
+            queryset (QuerySet): queryset of the serialized model.
+            extra_fields (String): additional columns to be fetched, e.g. the
+                ordering fields required by a paginator.
+
+            Returns:
+                QuerySet: dictionaries of the serialized columns.
+        """
+        fields = [name for name in cls._declared_fields if name != 'station_id']
+        expressions = {'station_id': F('weather_station__station_id')} \
+            if 'station_id' in cls._declared_fields else {}
+        return queryset.values(*fields, *extra_fields, **expressions)
 
-class WeatherRecordSerializer(serializers.ModelSerializer):
+    @classmethod
+    def values_list(cls, queryset):
+        """
+            Restricts a queryset to tuples of the serialized columns, in
+            declaration order, for the responses bypassing the serializer.
+
+            Args:
+            queryset (QuerySet): queryset of the serialized model.
+
+            Returns:
+                QuerySet: tuples of the serialized columns.
+        """
+        return queryset.values_list(*(
+            F('weather_station__station_id') if name == 'station_id' else name
+            for name in cls._declared_fields))
+
+
+class WeatherRecordSerializer(ValuesSerializer):
     """
-        Model serializer responsible for WeatherRecord model.
+        Read-only serializer responsible for WeatherRecord model.
 
         Dependencies:
             * WeatherRecordList
     """
-    station_id = serializers.CharField(
-        source="weather_station.station_id", read_only=True)
-
-    class Meta:
-        model = WeatherRecord
-        exclude = ['weather_station']
+    id = serializers.IntegerField(read_only=True)
+    station_id = serializers.CharField(read_only=True)
+    date = serializers.DateTimeField(read_only=True)
+    min_temp = serializers.FloatField(read_only=True)
+    max_temp = serializers.FloatField(read_only=True)
+    precipitation = serializers.FloatField(read_only=True)
+    create_timestamp = serializers.DateTimeField(read_only=True)
+    create_by = serializers.CharField(read_only=True)
+    update_timestamp = serializers.DateTimeField(read_only=True)
+    update_by = serializers.CharField(read_only=True)
 
 
-class WeatherStationStatsSerializer(serializers.ModelSerializer):
+class WeatherStationStatsSerializer(ValuesSerializer):
     """
-        Model serializer responsible for WeatherStationStats model.
+        Read-only serializer responsible for WeatherStationStats model.
 
         Dependencies:
             * WeatherStationStatsList
     """
-    station_id = serializers.CharField(
-        source="weather_station.station_id", read_only=True)
+    id = serializers.IntegerField(read_only=True)
+    station_id = serializers.CharField(read_only=True)
+    year = serializers.IntegerField(read_only=True)
+    period = serializers.CharField(read_only=True)
+    avg_max_temp = serializers.FloatField(read_only=True)
+    avg_min_temp = serializers.FloatField(read_only=True)
+    total_precipitation = serializers.FloatField(read_only=True)
+    max_temp_count = serializers.IntegerField(read_only=True)
+    min_temp_count = serializers.IntegerField(read_only=True)
+    precipitation_count = serializers.IntegerField(read_only=True)
+    is_complete = serializers.BooleanField(read_only=True)
 
-    class Meta:
-        model = WeatherStationStats
-        exclude = ['weather_station']
+
+class CropYieldRecordSerializer(ValuesSerializer):
+    """
+        Read-only serializer responsible for CropYieldRecord model.
+
+        Dependencies:
+            * CropYieldRecordList
+    """
+    id = serializers.IntegerField(read_only=True)
+    year = serializers.IntegerField(read_only=True)
+    total_yield = serializers.IntegerField(read_only=True)
+    create_timestamp = serializers.DateTimeField(read_only=True)
+    create_by = serializers.CharField(read_only=True)
+    update_timestamp = serializers.DateTimeField(read_only=True)
+    update_by = serializers.CharField(read_only=True)
+
+
+class YieldWeatherYearSerializer(serializers.Serializer):
+    """
+        Read-only serializer of a year of the yield weather correlation,
+        the yield next to the national aggregates of the station stats.
+
+        Dependencies:
+            * YieldWeatherCorrelation
+    """
+    year = serializers.IntegerField(read_only=True)
+    total_yield = serializers.IntegerField(read_only=True)
+    avg_max_temp = serializers.FloatField(read_only=True)
+    avg_min_temp = serializers.FloatField(read_only=True)
+    total_precipitation = serializers.FloatField(read_only=True)
+    stations_count = serializers.IntegerField(read_only=True)
+
+
+class StationMonthRollupSerializer(ValuesSerializer):
+    """
+        Read-only serializer responsible for StationMonthRollup model.
+
+        Dependencies:
+            * StationMonthRollupList
+    """
+    station_id = serializers.CharField(read_only=True)
+    year = serializers.IntegerField(read_only=True)
+    month = serializers.IntegerField(read_only=True)
+    avg_max_temp = serializers.FloatField(read_only=True)
+    avg_min_temp = serializers.FloatField(read_only=True)
+    total_precipitation = serializers.FloatField(read_only=True)
+    records_count = serializers.IntegerField(read_only=True)
+
+
+class NationalMonthRollupSerializer(ValuesSerializer):
+    """
+        Read-only serializer responsible for NationalMonthRollup model.
+
+        Dependencies:
+            * NationalMonthRollupList
+    """
+    year = serializers.IntegerField(read_only=True)
+    month = serializers.IntegerField(read_only=True)
+    avg_max_temp = serializers.FloatField(read_only=True)
+    avg_min_temp = serializers.FloatField(read_only=True)
+    total_precipitation = serializers.FloatField(read_only=True)
+    stations_count = serializers.IntegerField(read_only=True)
+
+
+class NationalYearRollupSerializer(ValuesSerializer):
+    """
+        Read-only serializer responsible for NationalYearRollup model.
+
+        Dependencies:
+            * NationalYearRollupList
+    """
+    year = serializers.IntegerField(read_only=True)
+    avg_max_temp = serializers.FloatField(read_only=True)
+    avg_min_temp = serializers.FloatField(read_only=True)
+    total_precipitation = serializers.FloatField(read_only=True)
+    stations_count = serializers.IntegerField(read_only=True)
@@ -0,0 +1,119 @@
+"""
+    This module contains streaming responses for weather_crop_info app.
+    Records are fetched with a server side cursor where the database
+    supports it, serialized and sent in chunks, so that the memory held by
+    a response does not depend on the number of records.
+
+    Author: Chandrahas Reddy Mandapati
+"""
+import csv
+import io
+from datetime import datetime
+
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from .parsers import batched
+
+# number of records fetched and serialized at a time.
+STREAM_CHUNK_SIZE = 2000
+
+
+def serialized_chunks(queryset, serializer_class, chunk_size=STREAM_CHUNK_SIZE):
+    """
+        Serializes a queryset chunk by chunk.
+
+        Args:
+        queryset (QuerySet): records to be serialized, in the streamed order.
+        serializer_class (Serializer): serializer of the records.
+        chunk_size (int): number of records fetched and serialized at a time.
+
+        Returns:
+            Generator: lists of serialized records.
+    """
+    chunk = []
+    for record in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield serializer_class(chunk, many=True).data
+            chunk = []
+    if chunk:
+        yield serializer_class(chunk, many=True).data
+
+
+def json_array_stream(queryset, serializer_class, chunk_size=STREAM_CHUNK_SIZE):
+    """
+        Encodes a queryset as a single JSON array, chunk by chunk.
+
+        Args:
+        queryset (QuerySet): records to be serialized, in the streamed order.
+        serializer_class (Serializer): serializer of the records.
+        chunk_size (int): number of records fetched and serialized at a time.
+
+        Returns:
+            Generator: JSON text fragments.
+    """
+    encoder = JSONEncoder(separators=(',', ':'))
+    separator = '['
+    for chunk in serialized_chunks(queryset, serializer_class, chunk_size):
+        yield separator + ','.join(map(encoder.encode, chunk))
+        separator = ','
+    yield ']' if separator == ',' else '[]'
+
+
+def streaming_json_response(queryset, serializer_class):
+    """
+        Streams a queryset as a JSON array response.
+
+        Args:
+        queryset (QuerySet): records to be serialized, in the streamed order.
+        serializer_class (Serializer): serializer of the records.
+
+        Returns:
+            StreamingHttpResponse: application/json response.
+    """
+    return StreamingHttpResponse(
+        json_array_stream(queryset, serializer_class), content_type='application/json')
+
+
+def ndjson_stream(rows, fields, chunk_size=STREAM_CHUNK_SIZE):
+    """
+        Encodes rows as newline delimited JSON, one object per row.
+
+        Args:
+        rows (Iterable): values_list tuples, in the streamed order.
+        fields (tuple): names of the row values.
+        chunk_size (int): number of rows encoded at a time.
+
+        Returns:
+            Generator: NDJSON text fragments.
+    """
+    encoder = JSONEncoder(separators=(',', ':'))
+    for chunk in batched(rows, chunk_size):
+        yield ''.join(encoder.encode(dict(zip(fields, row))) + '\n' for row in chunk)
+
+
+def csv_stream(rows, fields, chunk_size=STREAM_CHUNK_SIZE):
+    """
+        Encodes rows as CSV, with a header line. Datetimes are written in
+        ISO 8601 format and missing values as empty fields.
+
+        Args:
+        rows (Iterable): values_list tuples, in the streamed order.
+        fields (tuple): names of the row values.
+        chunk_size (int): number of rows encoded at a time.
+
+        Returns:
+            Generator: CSV text fragments.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for chunk in batched(rows, chunk_size):
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row]
+            for row in chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
@@ -2,20 +2,62 @@
     This module contains tests for weather_crop_info app. Test classes are 
     seperated based on model, views and controllers.
 """
+import json
 import os
-from datetime import datetime
+import statistics
+import subprocess
+import sys
+import tempfile
+import warnings
+from base64 import urlsafe_b64encode
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock, skipIf
 
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.timezone import make_aware
 
-from .models import (CropYieldRecord, WeatherRecord, WeatherStation,
-                     WeatherStationStats)
-from .scripts.calculate_weather_station_stats import \
-    update_weather_station_stats
+from . import columnar, parsers, workers
+from .caching import STATS_DATASET, get_generation
+from .models import (CropYieldRecord, NationalYearRollup, StationMonthRollup,
+                     WeatherIngestionLedger, WeatherRecord, WeatherStation,
+                     WeatherStationStats, WeatherStationStatsPending)
+from .scripts.calculate_weather_station_stats import (
+    update_pending_weather_station_stats, update_weather_station_stats,
+    weather_station_stats_query)
 from .scripts.ingest_crop_yield_records import \
     file_handler as crop_yield_file_handler
 from .scripts.ingest_weather_records import \
     file_handler as weather_record_file_handler
+from .scripts.ingest_weather_records import (ingest_weather_files,
+                                             upsert_weather_stations)
+from .pagination import WeatherRecordKeysetPagination
+from .partitions import (detach_year_partition, ensure_year_partitions,
+                         rebuild_weather_record, year_partitions)
+from .periods import YEAR_PERIOD
+from .rollups import refresh_rollups
+from .serializers import WeatherRecordSerializer
+from .views import WeatherRecordList, WeatherStationStatsList
+
+
+def process_files(function, pool_args, on_result=None, requested_size=None):
+    """
+        In process stand-in for workers.process_files, as worker processes
+        would not see the records of the test transaction.
+    """
+    results = []
+    for args in pool_args:
+        results.append(function(*args))
+        if on_result is not None:
+            on_result(args, results[-1])
+    return results
 
 
 class DataIngestionTestCase(TestCase):
@@ -79,6 +121,108 @@ class DataIngestionTestCase(TestCase):
             weather_station_id=weather_station.id, date=query_date)
         self.assertEqual(weather_record.min_temp, float(-128))
 
+    def test_weather_records_copy_loader(self):
+        """
+            This method tests the COPY loader of the weather records ingestion
+            script. Falls back to the ORM loader on databases other than
+            PostgreSQL, hence the same assertions hold on both paths.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model.
+        inserted_records_count = weather_record_file_handler(
+            self.weather_record_file_name, use_copy=True)
+        self.assertEqual(inserted_records_count, 2)
+        self.assertEqual(WeatherRecord.objects.count(), 2)
+
+        # re-ingesting updated values must upsert them.
+        with open(self.weather_record_file_name, "w+") as file:
+            file.writelines(["19850101\t-22\t-100\t-9999\n"])
+        weather_record_file_handler(
+            self.weather_record_file_name, update_conflicts=True, use_copy=True)
+        weather_record = WeatherRecord.objects.get(
+            date=datetime.strptime("19850101", "%Y%m%d"))
+        self.assertEqual(WeatherRecord.objects.count(), 2)
+        self.assertEqual(weather_record.min_temp, float(-100))
+        self.assertIsNone(weather_record.precipitation)
+
+    def test_weather_records_incremental_ingestion(self):
+        """
+            This method tests the ledger based incremental ingestion of
+            weather records. Unchanged files are skipped, appended lines are
+            ingested on their own and rewritten files are ingested in full.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model.
+        self.assertEqual(weather_record_file_handler(
+            self.weather_record_file_name, incremental=True), 2)
+        ledger = WeatherIngestionLedger.objects.get(file_name=self.station_id)
+        self.assertEqual(ledger.last_ingested_date,
+                         make_aware(datetime.strptime("19850102", "%Y%m%d")))
+
+        # unchanged and touched files are skipped.
+        self.assertEqual(weather_record_file_handler(
+            self.weather_record_file_name, incremental=True), 0)
+        os.utime(self.weather_record_file_name, (0, 0))
+        self.assertEqual(weather_record_file_handler(
+            self.weather_record_file_name, incremental=True), 0)
+
+        # only the appended tail is ingested.
+        with open(self.weather_record_file_name, "a") as file:
+            file.writelines(["19850103\t-100\t-200\t0\n"])
+        self.assertEqual(weather_record_file_handler(
+            self.weather_record_file_name, incremental=True), 1)
+        self.assertEqual(WeatherRecord.objects.count(), 3)
+        ledger.refresh_from_db()
+        self.assertEqual(ledger.last_ingested_date,
+                         make_aware(datetime.strptime("19850103", "%Y%m%d")))
+
+        # a rewritten file is ingested in full.
+        with open(self.weather_record_file_name, "r+") as file:
+            file.write("19850101\t-33")
+        self.assertEqual(weather_record_file_handler(
+            self.weather_record_file_name, update_conflicts=True, incremental=True), 3)
+        self.assertEqual(WeatherRecord.objects.get(
+            date=datetime.strptime("19850101", "%Y%m%d")).max_temp, float(-33))
+
+    def test_upsert_weather_stations(self):
+        """
+            This method tests that the weather stations of many files are
+            created upfront with a constant number of queries, leaving the
+            existing ones untouched.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        existing_station = WeatherStation.objects.create(
+            station_id=self.station_id, station_name=self.station_id)
+        station_ids = [self.station_id] + \
+            [f"USC{number:08d}" for number in range(1000, 1100)]
+        with self.assertNumQueries(2):
+            weather_station_ids = upsert_weather_stations(station_ids)
+
+        self.assertEqual(WeatherStation.objects.count(), len(station_ids))
+        self.assertEqual(weather_station_ids[self.station_id], existing_station.id)
+        self.assertEqual(weather_station_ids, dict(
+            WeatherStation.objects.values_list('station_id', 'id')))
+
+        # the file handler makes use of the provided station.
+        weather_record_file_handler(
+            self.weather_record_file_name, weather_station_id=existing_station.id)
+        self.assertEqual(existing_station.weatherrecord_set.count(), 2)
+
     def test_crop_yield_records_data_ingestion(self):
         """
             This method tests the data ingestion script for updating crop
@@ -119,14 +263,305 @@ class DataIngestionTestCase(TestCase):
         # testing correct creation of model records.
         weather_station = WeatherStation.objects.get(
             station_id=self.station_id)
-        station_stats = WeatherStationStats.objects.all()
+        station_stats = WeatherStationStats.objects.filter(period=YEAR_PERIOD)
         self.assertEqual(len(station_stats), 1)
 
         # testing the correctness of the data.
         station_stats_record = WeatherStationStats.objects.get(
-            weather_station_id=weather_station.id, year=1985)
+            weather_station_id=weather_station.id, year=1985, period=YEAR_PERIOD)
         self.assertEqual(station_stats_record.avg_max_temp, float(-72))
 
+        # periods without weather records have no stats.
+        self.assertEqual(sorted(WeatherStationStats.objects.values_list('period', flat=True)),
+                         ['month_01', YEAR_PERIOD])
+
+    def test_pending_weather_station_stats(self):
+        """
+            This method tests that only the station years touched by the
+            ingestion are recalculated by the incremental stats update.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model.
+        weather_record_file_handler(self.weather_record_file_name)
+        weather_station = WeatherStation.objects.get(
+            station_id=self.station_id)
+        self.assertEqual(list(WeatherStationStatsPending.objects.values_list(
+            'weather_station_id', 'year')), [(weather_station.id, 1985)])
+        update_pending_weather_station_stats()
+        self.assertFalse(WeatherStationStatsPending.objects.exists())
+        self.assertEqual(WeatherStationStats.objects.get(
+            weather_station=weather_station, year=1985, period=YEAR_PERIOD).avg_max_temp, float(-72))
+
+        # untouched years must not be recalculated.
+        WeatherStationStats.objects.filter(year=1985).update(avg_max_temp=0)
+        WeatherStationStats.objects.bulk_create([WeatherStationStats(
+            weather_station=weather_station, year=year) for year in range(1900, 1905)])
+        with open(self.weather_record_file_name, "a") as file:
+            file.writelines(["19860101\t-100\t-200\t0\n"])
+        weather_record_file_handler(
+            self.weather_record_file_name, incremental=True)
+        self.assertEqual(list(WeatherStationStatsPending.objects.values_list(
+            'year', flat=True)), [1986])
+        update_pending_weather_station_stats()
+        self.assertEqual(WeatherStationStats.objects.get(
+            weather_station=weather_station, year=1985, period=YEAR_PERIOD).avg_max_temp, 0)
+        self.assertEqual(WeatherStationStats.objects.get(
+            weather_station=weather_station, year=1986, period=YEAR_PERIOD).avg_max_temp, float(-100))
+
+    def test_period_weather_station_stats(self):
+        """
+            This method tests the statistics of the periods within the year,
+            combined from the buckets of the same aggregate query as the
+            yearly ones.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model, a record on the
+        # first and last day of every month.
+        weather_station = WeatherStation.objects.create(
+            station_id=self.station_id, station_name=self.station_id)
+        WeatherRecord.objects.bulk_create([
+            WeatherRecord(weather_station=weather_station, date=make_aware(datetime(1985, month, day)),
+                          max_temp=month, min_temp=-month, precipitation=1)
+            for month in range(1, 13) for day in (1, 28)
+        ])
+        # a bucket per month, the year and windows are combined from them.
+        with self.assertNumQueries(1):
+            buckets = list(weather_station_stats_query())
+        self.assertEqual(len(buckets), 12)
+
+        with self.settings(WEATHER_STATS_PERIODS={'growing_season': ((4, 1), (9, 30)),
+                                                  'harvest': ((9, 28), (10, 1))}):
+            update_weather_station_stats()
+            self.assertEqual(WeatherStationStats.objects.count(), 15)
+            stats = {record.period: record for record in WeatherStationStats.objects.all()}
+
+        self.assertEqual(stats[YEAR_PERIOD].avg_max_temp, 6.5)
+        self.assertEqual(stats[YEAR_PERIOD].total_precipitation, 24)
+        self.assertEqual(stats['month_07'].avg_min_temp, -7)
+        self.assertEqual(stats['month_07'].total_precipitation, 2)
+        self.assertEqual(stats['growing_season'].avg_max_temp, 6.5)
+        self.assertEqual(stats['growing_season'].total_precipitation, 12)
+        # both bounds of a window are inclusive.
+        self.assertEqual(stats['harvest'].avg_max_temp, 9.5)
+        self.assertEqual(stats['harvest'].total_precipitation, 2)
+
+        # windows overlapping two years are rejected.
+        with self.settings(WEATHER_STATS_PERIODS={'winter': ((12, 1), (2, 28))}):
+            with self.assertRaises(ImproperlyConfigured):
+                update_weather_station_stats()
+
+    def test_missing_data_weather_station_stats(self):
+        """
+            This method tests that every metric of the statistics is calculated
+            over its own observations, and the flagging of the statistics
+            missing too many of them.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model, a record on every
+        # day of the year with the precipitation missing in December and
+        # every metric missing on December 31.
+        weather_station = WeatherStation.objects.create(
+            station_id=self.station_id, station_name=self.station_id)
+        dates = [datetime(1985, 1, 1) + timedelta(days=day) for day in range(365)]
+        WeatherRecord.objects.bulk_create([
+            WeatherRecord(weather_station=weather_station, date=make_aware(date),
+                          max_temp=None if date.day == 31 and date.month == 12 else 10,
+                          min_temp=None if date.day == 31 and date.month == 12 else 0,
+                          precipitation=None if date.month == 12 else 1)
+            for date in dates
+        ])
+        update_weather_station_stats()
+        stats = {record.period: record for record in WeatherStationStats.objects.all()}
+
+        self.assertEqual(stats[YEAR_PERIOD].avg_max_temp, 10)
+        self.assertEqual(stats[YEAR_PERIOD].total_precipitation, 334)
+        self.assertEqual((stats[YEAR_PERIOD].max_temp_count, stats[YEAR_PERIOD].min_temp_count,
+                          stats[YEAR_PERIOD].precipitation_count), (364, 364, 334))
+        self.assertEqual(stats[YEAR_PERIOD].records_count, 365)
+        self.assertTrue(stats[YEAR_PERIOD].is_complete)
+        self.assertTrue(stats['month_01'].is_complete)
+        self.assertIsNone(stats['month_12'].total_precipitation)
+        self.assertEqual(stats['month_12'].precipitation_count, 0)
+        self.assertFalse(stats['month_12'].is_complete)
+
+        # a stricter threshold flags the year incomplete on the next upsert.
+        with self.settings(WEATHER_STATS_MISSING_DATA_THRESHOLD=0.05):
+            update_weather_station_stats(update_conflicts=True)
+        self.assertFalse(WeatherStationStats.objects.get(period=YEAR_PERIOD).is_complete)
+
+    def test_run_ingestion_pipeline(self):
+        """
+            This method tests the run_ingestion_pipeline command, running
+            every stage over a data directory of a crop yield file and two
+            weather station files.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        with tempfile.TemporaryDirectory() as weather_data_dir, \
+                tempfile.TemporaryDirectory() as crop_yield_data_dir:
+            with open(os.path.join(crop_yield_data_dir, "US_corn_grain_yield.txt"), "w") as file:
+                file.writelines(["1985\t225447\n", "1986\t208944\n"])
+            for station_id in ("USC00000072", "USC00000073"):
+                with open(os.path.join(weather_data_dir, f"{station_id}.txt"), "w") as file:
+                    file.writelines(["19850101\t-22\t-128\t94\n", "19850201\t-122\t-217\t0\n"])
+
+            stdout = StringIO()
+            with self.settings(WEATHER_DATA_DIR=weather_data_dir,
+                               CROP_YIELD_DATA_DIR=crop_yield_data_dir), \
+                    mock.patch('apps.weather_crop_info.scripts.ingest_weather_records.process_files',
+                               process_files), \
+                    mock.patch('apps.weather_crop_info.scripts.ingest_crop_yield_records.process_files',
+                               process_files):
+                call_command('run_ingestion_pipeline', stdout=stdout)
+
+        # records, yearly stats and rollups are written, pending flags cleared.
+        self.assertEqual(CropYieldRecord.objects.count(), 2)
+        self.assertEqual(WeatherRecord.objects.count(), 4)
+        self.assertEqual(WeatherStationStats.objects.filter(period=YEAR_PERIOD).count(), 2)
+        self.assertFalse(WeatherStationStatsPending.objects.exists())
+        self.assertEqual(StationMonthRollup.objects.count(), 4)
+        self.assertEqual(list(NationalYearRollup.objects.values_list('year', 'stations_count')),
+                         [(1985, 2)])
+
+        # every stage prints its timing.
+        output = stdout.getvalue()
+        self.assertIn("Ingested 2 crop yield records and 4 weather records", output)
+        for stage in ('crop yield ingestion', 'weather ingestion', 'rollups refresh',
+                      'stats refresh', 'total'):
+            self.assertRegex(output, rf"(?m)^{stage} +\d+\.\d{{3}} seconds")
+
+    def test_weather_ingestion_partition_years(self):
+        """
+            This method tests that the weather ingestion reads the partitions
+            of weather_record once per run, and creates the missing ones only,
+            from the years scanned out of every file. Runs on every database,
+            the partitions themselves are tested on PostgreSQL by
+            test_weather_record_partitions.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        files = [self.weather_record_file_name, "/tmp/USC00000073.txt"]
+        with open(files[1], "w+") as file:
+            file.writelines(["19851231\t-22\t-128\t94\n", "19860101\t-122\t-217\t0\n"])
+        self.assertEqual(parsers.file_years(files[1]), {1985, 1986})
+        self.assertEqual(parsers.file_years(files[1], offset=21), {1986})
+
+        module = 'apps.weather_crop_info.scripts.ingest_weather_records'
+        try:
+            with mock.patch(f'{module}.process_files', process_files), \
+                    mock.patch(f'{module}.year_partitions',
+                               return_value={1985: 'weather_record_y1985'}) as year_partitions, \
+                    mock.patch(f'{module}.ensure_year_partitions') as ensure_year_partitions:
+                ingest_weather_files(files)
+        finally:
+            os.remove(files[1])
+        year_partitions.assert_called_once_with()
+        ensure_year_partitions.assert_called_once_with({1985, 1986})
+        self.assertEqual(WeatherRecord.objects.count(), 4)
+
+        # unpartitioned, the files are not scanned at all.
+        with mock.patch(f'{module}.process_files', process_files), \
+                mock.patch(f'{module}.file_years') as file_years:
+            ingest_weather_files([self.weather_record_file_name], incremental=False)
+        file_years.assert_not_called()
+
+    @skipIf(connection.vendor != 'postgresql', "partitioning is PostgreSQL only")
+    def test_weather_record_partitions(self):
+        """
+            This method tests the yearly partitions of weather_record table:
+            the partitioning of the table, the partitions created by the
+            ingestion and the detachment of old years.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model, then partitioning
+        # weather_record as weather_record_partitions script does.
+        weather_record_file_handler(self.weather_record_file_name)
+        self.assertTrue(rebuild_weather_record(partitioned=True))
+        self.assertFalse(rebuild_weather_record(partitioned=True))
+        self.assertEqual(year_partitions(), {1985: 'weather_record_y1985'})
+        self.assertEqual(WeatherRecord.objects.count(), 2)
+
+        # year scoped queries are pruned to the partition of the year.
+        plan = WeatherRecord.objects.filter(date__year=1985).explain()
+        self.assertIn('weather_record_y1985', plan)
+        self.assertNotIn('weather_record_default', plan)
+
+        # both loaders create the partitions of new years.
+        with open(self.weather_record_file_name, "a") as file:
+            file.writelines(["19860101\t-100\t-200\t0\n"])
+        with CaptureQueriesContext(connection) as queries:
+            weather_record_file_handler(self.weather_record_file_name, incremental=True,
+                                        partition_years=year_partitions())
+
+        # the partition is attached in its own transaction, before the file's one.
+        sql = [query['sql'] for query in queries.captured_queries]
+        attach = next(index for index, query in enumerate(sql) if 'ATTACH PARTITION' in query)
+        insert = next(index for index, query in enumerate(sql)
+                      if query.startswith('INSERT INTO "weather_record"'))
+        self.assertTrue(any(query.startswith('RELEASE SAVEPOINT') for query in sql[attach:insert]))
+
+        with open(self.weather_record_file_name, "a") as file:
+            file.writelines(["19870101\t-100\t-200\t0\n"])
+        weather_record_file_handler(
+            self.weather_record_file_name, use_copy=True, incremental=True,
+            partition_years=year_partitions())
+        self.assertEqual(sorted(year_partitions()), [1985, 1986, 1987])
+        self.assertEqual(WeatherRecord.objects.count(), 4)
+
+        # records of a year without a partition are moved to its partition.
+        WeatherRecord.objects.create(
+            weather_station=WeatherStation.objects.get(station_id=self.station_id),
+            date=make_aware(datetime(1990, 1, 1)))
+        self.assertEqual(ensure_year_partitions([1987, 1990]), [1990])
+        # records written to a new partition keep drawing their id from the
+        # identity of weather_record.
+        last_id = WeatherRecord.objects.order_by('id').last().id
+        self.assertGreater(WeatherRecord.objects.create(
+            weather_station=WeatherStation.objects.get(station_id=self.station_id),
+            date=make_aware(datetime(1990, 1, 2))).id, last_id)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM weather_record_y1990")
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+        # old years are detached from the model.
+        self.assertEqual(detach_year_partition(1985), 'weather_record_y1985')
+        self.assertFalse(WeatherRecord.objects.filter(date__year=1985).exists())
+        with self.assertRaises(ValueError):
+            detach_year_partition(1985)
+
+        # the partitions are merged back into a single table.
+        self.assertTrue(rebuild_weather_record(partitioned=False))
+        self.assertIsNone(year_partitions())
+        self.assertEqual(WeatherRecord.objects.count(), 4)
+
     def tearDown(self):
         """
             This method is responsible for removing the setup that was created
@@ -142,6 +577,221 @@ class DataIngestionTestCase(TestCase):
         os.remove("/tmp/USC00000072.txt")
 
 
+class WeatherRecordsParserTestCase(SimpleTestCase):
+    """
+        This class is responsible for defining tests for the streaming
+        weather records parser.
+    """
+    # synthetic station file size, large enough for a list based parser
+    # to be several hundred megabytes in memory.
+    lines_count = 2_000_000
+
+    # allowed peak RSS growth over a bare interpreter, in kilobytes.
+    peak_rss_bound = 32 * 1024
+
+    measure_script = """
+import resource, sys
+from apps.weather_crop_info.parsers import batched, parse_weather_records
+parsed_records_count = 0
+if len(sys.argv) > 1:
+    for batch in batched(parse_weather_records(sys.argv[1]), 1000):
+        parsed_records_count += len(batch)
+print(parsed_records_count, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+    # ingestion file length, large enough for a loader buffering the whole
+    # file to exceed the bound (about 60 megabytes through the ORM).
+    ingestion_lines_count = 100_000
+
+    # ingests through file_handler into a migrated SQLite database file, whose
+    # page cache is bounded, with DEBUG off so that no query is logged.
+    ingestion_measure_script = """
+import os, resource, sys, django
+from django.conf import settings
+os.environ['DJANGO_SETTINGS_MODULE'] = 'django_project.settings'
+settings.DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': sys.argv[1]}}
+settings.DEBUG = False
+django.setup()
+from django.core.management import call_command
+from apps.weather_crop_info.scripts.ingest_weather_records import file_handler
+call_command('migrate', verbosity=0)
+created_records_count = 0
+if len(sys.argv) > 2:
+    created_records_count = file_handler(sys.argv[2], incremental=True)
+print(created_records_count, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+    def setUp(self):
+        """
+            This method creates the synthetic station file.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        self.weather_record_file_name = "/tmp/USC00000073.txt"
+        with open(self.weather_record_file_name, "w+") as file:
+            file.writelines("19850101\t-22\t-128\t94\n"
+                            for _ in range(self.lines_count))
+
+    def measure(self, *args, script=None):
+        """
+            Runs the parse and batch pipeline, or another measure script, in
+            a fresh interpreter.
+
+            Args:
+                args: optional station file to be parsed.
+                script (String): measure script, measure_script when None.
+
+            Returns:
+                int: parsed records count.
+                int: peak RSS of the interpreter in kilobytes.
+        """
+        output = subprocess.run(
+            [sys.executable, "-c", script or self.measure_script, *args],
+            cwd=settings.BASE_DIR, capture_output=True, check=True, text=True).stdout
+        # the measures are printed last, after the output of the ingestion.
+        parsed_records_count, peak_rss = map(int, output.splitlines()[-1].split())
+        return parsed_records_count, peak_rss
+
+    def test_weather_records_parser_peak_memory(self):
+        """
+            This method tests that the parser alone, parse_weather_records
+            and batched, holds at most one batch of a station file in memory,
+            regardless of the file length. The ingestion is covered by
+            test_weather_records_ingestion_peak_memory.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        _, baseline_peak_rss = self.measure()
+        parsed_records_count, peak_rss = self.measure(
+            self.weather_record_file_name)
+
+        self.assertEqual(parsed_records_count, self.lines_count)
+        self.assertLess(peak_rss - baseline_peak_rss, self.peak_rss_bound)
+
+    def test_weather_records_ingestion_peak_memory(self):
+        """
+            This method tests that ingesting a station file through
+            file_handler, i.e. the ledger digests, the parser and the loader,
+            holds at most one batch in memory, regardless of the file length.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            # one record per day, so that every line is written.
+            file_name = os.path.join(directory, "USC00000074.txt")
+            first_date = datetime(1800, 1, 1)
+            with open(file_name, "w") as file:
+                file.writelines(
+                    f"{first_date + timedelta(days=day):%Y%m%d}\t-22\t-128\t94\n"
+                    for day in range(self.ingestion_lines_count))
+
+            _, baseline_peak_rss = self.measure(
+                os.path.join(directory, "baseline.sqlite3"), script=self.ingestion_measure_script)
+            created_records_count, peak_rss = self.measure(
+                os.path.join(directory, "ingestion.sqlite3"), file_name,
+                script=self.ingestion_measure_script)
+
+        self.assertEqual(created_records_count, self.ingestion_lines_count)
+        self.assertLess(peak_rss - baseline_peak_rss, self.peak_rss_bound)
+
+    def test_weather_records_decoder(self):
+        """
+            This method tests that the fixed-layout decoder matches the
+            strptime based parse, with and without NumPy.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        lines = ["19850101\t-22\t-128\t94\n", "19840229\t-9999\t-217\t0\n"]
+        expected = [
+            (datetime.strptime("19850101", "%Y%m%d"), -128.0, -22.0, 94.0),
+            (datetime.strptime("19840229", "%Y%m%d"), -217.0, None, 0.0),
+        ]
+        use_numpy_options = [False] + ([True] if parsers.np is not None else [])
+        for use_numpy in use_numpy_options:
+            self.assertEqual(
+                parsers.decode_weather_lines(lines, use_numpy), expected)
+
+            # impossible dates and malformed lines must be rejected.
+            with self.assertRaises(ValueError):
+                parsers.decode_weather_lines(
+                    ["19850230\t-22\t-128\t94\n"], use_numpy)
+            with self.assertRaises(ValueError):
+                parsers.decode_weather_lines(
+                    ["19850101\t-22\t-128\n"], use_numpy)
+
+    def tearDown(self):
+        """
+            This method removes the synthetic station file.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        os.remove(self.weather_record_file_name)
+
+
+class WorkersTestCase(SimpleTestCase):
+    """
+        This class is responsible for defining tests for the ingestion
+        process pool.
+    """
+
+    def test_pool_size(self):
+        """
+            This method tests that the pool size defaults to the number of
+            CPUs and is capped by the connection budget and the tasks count.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        with self.settings(INGESTION_POOL_SIZE=None, INGESTION_DB_CONNECTION_BUDGET=None):
+            self.assertEqual(workers.pool_size(10_000), os.cpu_count())
+        with self.settings(INGESTION_POOL_SIZE=32, INGESTION_DB_CONNECTION_BUDGET=20):
+            self.assertEqual(workers.pool_size(10_000), 20)
+            self.assertEqual(workers.pool_size(3), 3)
+            self.assertEqual(workers.pool_size(10_000, requested_size=4), 4)
+            self.assertEqual(workers.pool_size(0), 1)
+
+    def test_process_files_start_methods(self):
+        """
+            This method tests that the ingestion pool works under both the
+            fork and the spawn start methods.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        files = [[parsers.__file__], [workers.__file__]]
+        for start_method in ["fork", "spawn"]:
+            with self.settings(INGESTION_START_METHOD=start_method):
+                self.assertEqual(
+                    sorted(workers.process_files(os.path.getsize, files, requested_size=2)),
+                    sorted(os.path.getsize(file) for file, in files))
+
+
 class WeatherAPITestCase(TestCase):
     def setUp(self):
         """
@@ -188,6 +838,600 @@ class WeatherAPITestCase(TestCase):
         for record in response.data:
             self.assertEqual(record.get("station_id"), self.station_id)
 
+    def test_weather_api_cursor_pagination(self):
+        """
+            This method tests the keyset pagination of WeatherRecordList view,
+            walking every page forwards and then backwards.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model.
+        weather_record_file_handler(self.weather_record_file_name)
+        weather_station = WeatherStation.objects.create(station_id="USC00000073")
+        WeatherRecord.objects.bulk_create([
+            WeatherRecord(weather_station=weather_station,
+                          date=make_aware(datetime(1985, 1, day)), min_temp=day)
+            for day in range(1, 24)
+        ])
+        expected = list(WeatherRecord.objects.order_by(
+            'weather_station_id', 'date', 'id').values_list('id', flat=True))
+
+        # walking forwards, no page counts the records.
+        url, pages = '/weather-crop-info/v1/api/weather?pagination=cursor', []
+        while url is not None:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(any('COUNT(' in query['sql'].upper()
+                                 for query in context.captured_queries))
+            pages.append(response.data)
+            url = response.data['next']
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]['previous'])
+        self.assertEqual([record['id'] for page in pages for record in page['results']],
+                         expected)
+
+        # walking backwards from the last page.
+        url, previous_ids = pages[-1]['previous'], []
+        while url is not None:
+            response = self.client.get(url)
+            previous_ids = [record['id'] for record in response.data['results']] + previous_ids
+            url = response.data['previous']
+        self.assertEqual(previous_ids, expected[:20])
+
+        # tampered cursors are rejected, including well formed tokens
+        # carrying values which do not fit the ordering fields.
+        tokens = ['invalid'] + [
+            urlsafe_b64encode(json.dumps({'p': values, 'r': 0}).encode()).decode()
+            for values in (["x", "1985-01-01T00:00:00+00:00", "y"],
+                           [1, "1985-01-01T00:00:00+00:00", 1.5],
+                           [1, "1985-01-01T00:00:00+00:00", 2 ** 64],
+                           [1, "1985-01-01T00:00:00", 1],
+                           [1, 19850101, 1])]
+        for path in ('v1/api/weather', 'v1/async/api/weather'):
+            for token in tokens:
+                response = self.client.get(f'/weather-crop-info/{path}',
+                                           {'pagination': 'cursor', 'cursor': token})
+                self.assertEqual(response.status_code, 404)
+
+    def test_weather_api_queries_count(self):
+        """
+            This method tests that the list views serialize a page with a
+            constant number of queries, whatever the page size.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model.
+        for station_id in ("USC00000073", "USC00000074"):
+            weather_station = WeatherStation.objects.create(
+                station_id=station_id, station_name=station_id)
+            WeatherRecord.objects.bulk_create([
+                WeatherRecord(weather_station=weather_station,
+                              date=make_aware(datetime(1985, 1, day)), min_temp=day)
+                for day in range(1, 11)
+            ])
+            WeatherStationStats.objects.bulk_create([
+                WeatherStationStats(weather_station=weather_station, year=year)
+                for year in range(1985, 1995)
+            ])
+
+        # a count query and a page query for page number pagination,
+        # a single page query for keyset pagination. Unfiltered pages, stats
+        # filtered on the default period alike, also look up the planner
+        # estimate on PostgreSQL, uncached stats pages the stats generation.
+        get_generation(STATS_DATASET)
+        estimate_queries = 1 if connection.vendor == 'postgresql' else 0
+        for page_size in (1, 5, 20):
+            with mock.patch.object(WeatherRecordList, 'page_size', page_size), \
+                    mock.patch.object(WeatherStationStatsList, 'page_size', page_size):
+                with self.assertNumQueries(2 + estimate_queries):
+                    response = self.client.get('/weather-crop-info/v1/api/weather')
+                self.assertEqual(len(response.data), page_size)
+                self.assertIn(response.data[0]['station_id'], ("USC00000073", "USC00000074"))
+
+                with self.assertNumQueries(3 + estimate_queries):
+                    response = self.client.get('/weather-crop-info/v1/api/weather/stats')
+                self.assertEqual(len(response.data), page_size)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                '/weather-crop-info/v1/api/weather', {'pagination': 'cursor'})
+        self.assertEqual(len(response.data['results']), settings.REST_FRAMEWORK['PAGE_SIZE'])
+
+    def test_weather_api_station_match(self):
+        """
+            This method tests the station-id matching modes of the list views.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model.
+        for station_id in ("USC00110072", "USC00110073", "XUSC0011007"):
+            weather_station = WeatherStation.objects.create(
+                station_id=station_id, station_name=station_id)
+            WeatherRecord.objects.create(
+                weather_station=weather_station, date=make_aware(datetime(1985, 1, 1)))
+            WeatherStationStats.objects.create(weather_station=weather_station, year=1985)
+
+        expected = {
+            ('USC00110072', 'exact'): {'USC00110072'},
+            ('USC0011007', 'exact'): set(),
+            ('USC0011007', None): {'USC00110072', 'USC00110073'},
+            ('USC0011007', 'prefix'): {'USC00110072', 'USC00110073'},
+            ('USC0011007', 'contains'): {'USC00110072', 'USC00110073', 'XUSC0011007'},
+        }
+        for url in ('/weather-crop-info/v1/api/weather', '/weather-crop-info/v1/api/weather/stats'):
+            for (station_id, station_match), station_ids in expected.items():
+                params = {'station-id': station_id}
+                if station_match is not None:
+                    params['station-match'] = station_match
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual({record['station_id'] for record in response.data}, station_ids)
+
+            response = self.client.get(url, {'station-id': 'USC', 'station-match': 'regex'})
+            self.assertEqual(response.status_code, 400)
+
+    def test_weather_api_date_range_and_stations(self):
+        """
+            This method tests the date range and station list filters of the
+            WeatherRecordList view, paginated and streamed.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model.
+        for station_id in ("USC00110072", "USC00110073", "USC00110074"):
+            weather_station = WeatherStation.objects.create(
+                station_id=station_id, station_name=station_id)
+            WeatherRecord.objects.bulk_create([
+                WeatherRecord(weather_station=weather_station,
+                              date=make_aware(datetime(1985, 1, day)), min_temp=day)
+                for day in range(1, 11)
+            ])
+
+        params = {'station-id': 'USC00110074,USC00110072', 'station-match': 'exact',
+                  'start-date': '19850103', 'end-date': '19850105'}
+        response = self.client.get('/weather-crop-info/v1/api/weather', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 6)
+
+        response = self.client.get(
+            '/weather-crop-info/v1/api/weather', {**params, 'pagination': 'stream'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        records = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([(record['station_id'], record['min_temp']) for record in records], [
+            (station_id, day) for station_id in ("USC00110072", "USC00110074") for day in (3, 4, 5)])
+        self.assertTrue(records[0]['date'].startswith('1985-01-03'))
+
+        # empty results stream an empty array.
+        response = self.client.get('/weather-crop-info/v1/api/weather', {
+            'start-date': '19900101', 'pagination': 'stream'})
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), [])
+
+        response = self.client.get('/weather-crop-info/v1/api/weather', {'end-date': '1985'})
+        self.assertEqual(response.status_code, 400)
+
+        # a single date is as timezone aware as the range.
+        with warnings.catch_warnings():
+            warnings.filterwarnings('error', '.*naive datetime', RuntimeWarning)
+            response = self.client.get('/weather-crop-info/v1/api/weather', {
+                'station-id': 'USC00110072', 'date': '19850104'})
+        self.assertEqual([record['min_temp'] for record in response.data], [4])
+
+    def test_weather_api_conditional_get(self):
+        """
+            This method tests the ETag of the WeatherRecordList view, answering
+            304 without serializing until the matching records change.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model.
+        weather_record_file_handler(self.weather_record_file_name)
+        url = '/weather-crop-info/v1/api/weather'
+        params = {'station-id': self.station_id, 'date': '19850101'}
+
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        # a single aggregate query, nothing serialized.
+        with self.assertNumQueries(1), \
+                mock.patch.object(WeatherRecordSerializer, 'to_representation') as to_representation:
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        to_representation.assert_not_called()
+
+        # other pages get other tags.
+        response = self.client.get(url, {**params, 'date': '19850102'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        # updated records change the tag.
+        with open(self.weather_record_file_name, "w") as file:
+            file.writelines(["19850101\t-21\t-128\t94\n", "19850102\t-122\t-217\t0\n"])
+        weather_record_file_handler(self.weather_record_file_name, update_conflicts=True)
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data[0]['max_temp'], -21.0)
+
+    @override_settings(PAGINATION_APPROXIMATE_COUNT_THRESHOLD=5)
+    def test_weather_api_approximate_count(self):
+        """
+            This method tests the count headers of the WeatherRecordList view,
+            exact for filtered pages and approximate for unfiltered pages of
+            large tables.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model.
+        weather_station = WeatherStation.objects.create(
+            station_id=self.station_id, station_name=self.station_id)
+        WeatherRecord.objects.bulk_create([
+            WeatherRecord(weather_station=weather_station,
+                          date=make_aware(datetime(1985, 1, day)), min_temp=day)
+            for day in range(1, 21)
+        ])
+        cache.clear()
+        self.addCleanup(cache.clear)
+        url = '/weather-crop-info/v1/api/weather'
+
+        response = self.client.get(url, {'station-id': self.station_id, 'date': '19850101'})
+        self.assertEqual(response['X-Total-Count'], '1')
+        self.assertEqual(response['X-Total-Count-Approximate'], 'false')
+
+        if connection.vendor == 'postgresql':
+            # the planner estimate, once the table is analyzed.
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE weather_record")
+        else:
+            # an exact count, cached for the next pages.
+            response = self.client.get(url)
+            self.assertEqual(response['X-Total-Count'], '20')
+            self.assertEqual(response['X-Total-Count-Approximate'], 'false')
+            WeatherRecord.objects.filter(date=make_aware(datetime(1985, 1, 20))).delete()
+
+        with self.assertNumQueries(2 if connection.vendor == 'postgresql' else 1):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Total-Count'], '20')
+        self.assertEqual(response['X-Total-Count-Approximate'], 'true')
+
+    @override_settings(PAGINATION_APPROXIMATE_COUNT_THRESHOLD=5)
+    def test_weather_stats_api_approximate_count(self):
+        """
+            This method tests the count headers of the WeatherStationStatsList
+            view, approximate for unfiltered pages, which are filtered on the
+            default period only.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model.
+        weather_station = WeatherStation.objects.create(
+            station_id=self.station_id, station_name=self.station_id)
+        WeatherStationStats.objects.bulk_create([
+            WeatherStationStats(weather_station=weather_station, year=year, period=period)
+            for year in range(1980, 1992) for period in (YEAR_PERIOD, 'month_01')
+        ])
+        cache.clear()
+        self.addCleanup(cache.clear)
+        url = '/weather-crop-info/v1/api/weather/stats'
+
+        response = self.client.get(url, {'year': 1985})
+        self.assertEqual(response['X-Total-Count'], '1')
+        self.assertEqual(response['X-Total-Count-Approximate'], 'false')
+
+        params = {'page': 2}
+        if connection.vendor == 'postgresql':
+            # the planner estimate of the default period, once analyzed.
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE weather_station_stats")
+        else:
+            # an exact count, cached for the next pages.
+            response = self.client.get(url)
+            self.assertEqual(response['X-Total-Count'], '12')
+            self.assertEqual(response['X-Total-Count-Approximate'], 'false')
+
+        for path in ('v1/api/weather/stats', 'v1/async/api/weather/stats'):
+            response = self.client.get(f'/weather-crop-info/{path}', params)
+            self.assertEqual(response['X-Total-Count'], '12')
+            self.assertEqual(response['X-Total-Count-Approximate'], 'true')
+            params = {'page': 2, 'period': YEAR_PERIOD}
+
+    def test_weather_export_api(self):
+        """
+            This method tests the WeatherRecordExport view in both formats.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model.
+        weather_record_file_handler(self.weather_record_file_name)
+
+        # testing the url resolution towards view
+        self.assertEqual('/weather-crop-info/v1/api/weather/export', reverse(
+            'WeatherRecordExport'))
+
+        # NDJSON by default, one record per line.
+        response = self.client.get('/weather-crop-info/v1/api/weather/export',
+                                   {'station-id': self.station_id})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        records = [json.loads(line) for line in
+                   b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(records, [
+            {'station_id': self.station_id, 'date': '1985-01-01T00:00:00Z',
+             'min_temp': -128.0, 'max_temp': -22.0, 'precipitation': 94.0},
+            {'station_id': self.station_id, 'date': '1985-01-02T00:00:00Z',
+             'min_temp': -217.0, 'max_temp': -122.0, 'precipitation': 0.0},
+        ])
+
+        # CSV through the format parameter or the Accept header.
+        for params, headers in (({'format': 'csv'}, {}), ({}, {'HTTP_ACCEPT': 'text/csv'})):
+            response = self.client.get('/weather-crop-info/v1/api/weather/export',
+                                       {'end-date': '19850101', **params}, **headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response['Content-Type'].startswith('text/csv'))
+            self.assertEqual(b''.join(response.streaming_content).decode().splitlines(), [
+                'station_id,date,min_temp,max_temp,precipitation',
+                f'{self.station_id},1985-01-01T00:00:00+00:00,-128.0,-22.0,94.0',
+            ])
+
+        response = self.client.get('/weather-crop-info/v1/api/weather/export',
+                                   {'start-date': 'invalid'})
+        self.assertEqual(response.status_code, 400)
+
+    @skipIf(columnar.pa is None, "pyarrow is not installed")
+    def test_weather_api_columnar_formats(self):
+        """
+            This method tests the Arrow IPC and Parquet responses of the list
+            views against their JSON responses.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model.
+        weather_record_file_handler(self.weather_record_file_name)
+        update_weather_station_stats()
+
+        for url in ('/weather-crop-info/v1/api/weather', '/weather-crop-info/v1/api/weather/stats'):
+            expected = self.client.get(url).data
+            for params, headers, read in (
+                    ({'format': 'arrow'}, {}, lambda body: columnar.pa.ipc.open_stream(body).read_all()),
+                    ({}, {'HTTP_ACCEPT': 'application/vnd.apache.parquet'},
+                     lambda body: columnar.pq.read_table(columnar.pa.BufferReader(body)))):
+                response = self.client.get(url, params, **headers)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.streaming)
+                table = read(b''.join(response.streaming_content))
+                self.assertEqual(table.column_names, list(expected[0]))
+                self.assertEqual(table.column('id').to_pylist(),
+                                 [record['id'] for record in expected])
+                self.assertEqual(table.column('station_id').to_pylist(),
+                                 [record['station_id'] for record in expected])
+
+        # errors are rendered in the negotiated format.
+        response = self.client.get('/weather-crop-info/v1/api/weather',
+                                   {'format': 'arrow', 'date': 'invalid'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('detail', columnar.pa.ipc.open_stream(response.content).read_all().column_names)
+
+    def test_crop_yield_api(self):
+        """
+            This method tests the CropYieldRecordList view.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model.
+        CropYieldRecord.objects.bulk_create([
+            CropYieldRecord(year=year, total_yield=1000 + year) for year in range(1985, 2000)])
+
+        # testing the url resolution towards view
+        self.assertEqual('/weather-crop-info/v1/api/yield', reverse('CropYieldRecord'))
+
+        response = self.client.get('/weather-crop-info/v1/api/yield',
+                                   {'start-year': 1990, 'end-year': 1995})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Total-Count'], '6')
+        self.assertEqual([record['year'] for record in response.data], list(range(1990, 1996)))
+        self.assertEqual(response.data[0]['total_yield'], 2990)
+
+        response = self.client.get('/weather-crop-info/v1/api/yield', {'start-year': 'invalid'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_yield_weather_correlation_api(self):
+        """
+            This method tests the YieldWeatherCorrelation view against the
+            correlations computed in python.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model, precipitation is
+        # unknown in 1989.
+        years = range(1985, 1992)
+        for index, station_id in enumerate(("USC00000073", "USC00000074")):
+            weather_station = WeatherStation.objects.create(
+                station_id=station_id, station_name=station_id)
+            WeatherStationStats.objects.bulk_create([
+                WeatherStationStats(
+                    weather_station=weather_station, year=year, avg_max_temp=(year % 7) * 10 + index,
+                    avg_min_temp=-(year % 3) - index,
+                    total_precipitation=None if year == 1989 else (year % 5) * 100 + index)
+                for year in years
+            ])
+        CropYieldRecord.objects.bulk_create([
+            CropYieldRecord(year=year, total_yield=(year % 4) * 1000 + year) for year in range(1984, 1991)])
+
+        # testing the url resolution towards view
+        self.assertEqual('/weather-crop-info/v1/api/yield/correlation',
+                         reverse('YieldWeatherCorrelation'))
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/weather-crop-info/v1/api/yield/correlation',
+                                       {'end-year': 1990})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['years_count'], 6)
+        self.assertEqual([year['year'] for year in response.data['years']], list(range(1985, 1991)))
+        self.assertEqual(response.data['years'][0]['avg_max_temp'], (1985 % 7) * 10 + 0.5)
+        self.assertEqual(response.data['years'][0]['stations_count'], 2)
+
+        national = {year['year']: year for year in response.data['years']}
+        for metric in ('avg_max_temp', 'avg_min_temp', 'total_precipitation'):
+            known = [year for year in national.values() if year[metric] is not None]
+            self.assertAlmostEqual(
+                response.data['correlations'][metric],
+                statistics.correlation([year['total_yield'] for year in known],
+                                       [year[metric] for year in known]))
+
+    def test_weather_rollups_api(self):
+        """
+            This method tests the rollup views, read from the rollups
+            refreshed from the stats.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model.
+        for index, station_id in enumerate(("USC00000073", "USC00000074")):
+            weather_station = WeatherStation.objects.create(
+                station_id=station_id, station_name=station_id)
+            WeatherRecord.objects.bulk_create([
+                WeatherRecord(weather_station=weather_station, date=make_aware(datetime(1985, month, day)),
+                              max_temp=month * 10 + index, min_temp=-day, precipitation=day)
+                for month in (1, 2) for day in (1, 2, 3)
+            ])
+        update_weather_station_stats()
+        refresh_rollups()
+        url = '/weather-crop-info/v1/api/weather/rollups'
+
+        # testing the url resolution towards views
+        self.assertEqual(f'{url}/yearly', reverse('NationalYearRollup'))
+        self.assertEqual(f'{url}/monthly', reverse('NationalMonthRollup'))
+        self.assertEqual(f'{url}/stations/monthly', reverse('StationMonthRollup'))
+
+        response = self.client.get(f'{url}/stations/monthly',
+                                   {'station-id': 'USC00000074', 'month': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [{
+            'station_id': 'USC00000074', 'year': 1985, 'month': 2, 'avg_max_temp': 21.0,
+            'avg_min_temp': -2.0, 'total_precipitation': 6.0, 'records_count': 3}])
+
+        response = self.client.get(f'{url}/monthly', {'start-year': 1985, 'end-year': 1985})
+        self.assertEqual([(rollup['month'], rollup['avg_max_temp'], rollup['stations_count'])
+                          for rollup in response.data], [(1, 10.5, 2), (2, 20.5, 2)])
+
+        response = self.client.get(f'{url}/yearly')
+        self.assertEqual(response.data[0]['year'], 1985)
+        self.assertEqual(response.data[0]['avg_max_temp'], 15.5)
+        self.assertEqual(response.data[0]['total_precipitation'], 12.0)
+
+        # rollups follow the records once the stats are updated and refreshed.
+        WeatherRecord.objects.filter(date__month=2).update(max_temp=0)
+        refresh_rollups()
+        response = self.client.get(f'{url}/monthly', {'month': 2})
+        self.assertEqual(response.data[0]['avg_max_temp'], 20.5)
+        update_weather_station_stats(update_conflicts=True)
+        refresh_rollups()
+        response = self.client.get(f'{url}/monthly', {'month': 2})
+        self.assertEqual(response.data[0]['avg_max_temp'], 0.0)
+
+        response = self.client.get(f'{url}/monthly', {'month': 'invalid'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_async_list_views(self):
+        """
+            This method tests that the async list views answer as the sync
+            list views do.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model.
+        weather_record_file_handler(self.weather_record_file_name)
+        update_weather_station_stats()
+
+        # testing the url resolution towards views
+        self.assertEqual('/weather-crop-info/v1/async/api/weather', reverse('AsyncWeatherRecord'))
+        self.assertEqual('/weather-crop-info/v1/async/api/weather/stats',
+                         reverse('AsyncWeatherStationStats'))
+
+        for path, params in (
+                ('weather', {}), ('weather', {'station-id': self.station_id, 'date': '19850101'}),
+                ('weather', {'page': 2}), ('weather', {'date': 'invalid'}),
+                ('weather/stats', {'year': 1985}), ('weather/stats', {'station-match': 'invalid',
+                                                                      'station-id': self.station_id})):
+            expected = self.client.get(f'/weather-crop-info/v1/api/{path}', params)
+            response = self.client.get(f'/weather-crop-info/v1/async/api/{path}', params)
+            self.assertEqual(response.status_code, expected.status_code)
+            self.assertEqual(response.content, expected.content)
+            for header in ('Content-Type', 'X-Total-Count', 'X-Total-Count-Approximate', 'ETag'):
+                self.assertEqual(response.get(header), expected.get(header))
+
+        # conditional requests, and cursor pagination.
+        params = {'station-id': self.station_id, 'date': '19850101'}
+        etag = self.client.get('/weather-crop-info/v1/api/weather', params)['ETag']
+        response = self.client.get('/weather-crop-info/v1/async/api/weather', params,
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with mock.patch.object(WeatherRecordKeysetPagination, 'page_size', 1):
+            response = self.client.get('/weather-crop-info/v1/async/api/weather',
+                                       {'pagination': 'cursor'})
+            self.assertEqual(len(response.json()['results']), 1)
+            response = self.client.get(response.json()['next'])
+        self.assertEqual(response.json()['results'][0]['date'], '1985-01-02T00:00:00Z')
+        self.assertIsNone(response.json()['next'])
+
+        # streamed responses are left to the sync view.
+        response = self.client.get('/weather-crop-info/v1/async/api/weather', {'pagination': 'stream'})
+        self.assertEqual(response.status_code, 400)
+
     def test_weather_stats_api(self):
         """
             This method tests the WeatherStationStatsList view.
@@ -212,6 +1456,73 @@ class WeatherAPITestCase(TestCase):
         for record in response.data:
             self.assertEqual(record.get("station_id"), self.station_id)
 
+        # stats of the periods within the year.
+        update_weather_station_stats()
+        response = self.client.get(
+            '/weather-crop-info/v1/api/weather/stats', {'period': 'month_01'})
+        self.assertEqual([(record['period'], record['avg_max_temp']) for record in response.data],
+                         [('month_01', -72.0)])
+        response = self.client.get(
+            '/weather-crop-info/v1/api/weather/stats', {'period': 'growing_season'})
+        self.assertEqual(response.data, [])
+        response = self.client.get(
+            '/weather-crop-info/v1/api/weather/stats', {'period': 'invalid'})
+        self.assertEqual(response.status_code, 400)
+
+        # stats missing most of the days of the year are incomplete.
+        response = self.client.get(
+            '/weather-crop-info/v1/api/weather/stats', {'complete': 'true'})
+        self.assertEqual(response.data, [])
+        response = self.client.get(
+            '/weather-crop-info/v1/api/weather/stats', {'complete': 'false'})
+        self.assertEqual([(record['max_temp_count'], record['is_complete'])
+                          for record in response.data], [(2, False)])
+        response = self.client.get(
+            '/weather-crop-info/v1/api/weather/stats', {'complete': 'maybe'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_weather_stats_api_cache(self):
+        """
+            This method tests the caching and the conditional requests of the
+            WeatherStationStatsList view, invalidated by the stats script.
+
+            Args:
+                self.
+
+            Returns:
+                None
+        """
+        # populating the data into the respective model.
+        weather_record_file_handler(self.weather_record_file_name)
+        update_weather_station_stats()
+        url = '/weather-crop-info/v1/api/weather/stats'
+        params = {'station-id': self.station_id, 'year': 1985}
+
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['avg_max_temp'], -72.0)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        # the same page, whatever the order of the parameters, is served from
+        # the cache with the generation lookup as only query.
+        with self.assertNumQueries(1):
+            response = self.client.get(url, dict(reversed(params.items())))
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.data[0]['avg_max_temp'], -72.0)
+
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(url, params, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        # writing the stats invalidates the cached pages.
+        WeatherRecord.objects.update(max_temp=10)
+        update_weather_station_stats(update_conflicts=True)
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data[0]['avg_max_temp'], 10.0)
+
     def tearDown(self):
         """
             This method is responsible for removing the setup that was created
@@ -9,6 +9,21 @@ from . import views
 
 urlpatterns = [
     path('v1/api/weather', views.WeatherRecordList.as_view(), name='WeatherRecord'),
+    path('v1/api/weather/export', views.WeatherRecordExport.as_view(),
+         name='WeatherRecordExport'),
     path('v1/api/weather/stats', views.WeatherStationStatsList.as_view(),
          name='WeatherStationStats'),
+    path('v1/api/weather/rollups/yearly', views.NationalYearRollupList.as_view(),
+         name='NationalYearRollup'),
+    path('v1/api/weather/rollups/monthly', views.NationalMonthRollupList.as_view(),
+         name='NationalMonthRollup'),
+    path('v1/api/weather/rollups/stations/monthly', views.StationMonthRollupList.as_view(),
+         name='StationMonthRollup'),
+    path('v1/api/yield', views.CropYieldRecordList.as_view(), name='CropYieldRecord'),
+    path('v1/api/yield/correlation', views.YieldWeatherCorrelation.as_view(),
+         name='YieldWeatherCorrelation'),
+    path('v1/async/api/weather', views.AsyncWeatherRecordList.as_view(),
+         name='AsyncWeatherRecord'),
+    path('v1/async/api/weather/stats', views.AsyncWeatherStationStatsList.as_view(),
+         name='AsyncWeatherStationStats'),
 ]
@@ -3,48 +3,114 @@
 
     Author: Chandrahas Reddy Mandapati 
 """
-from datetime import datetime
+from functools import partial
 from http import HTTPStatus
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import render
-from rest_framework.pagination import PageNumberPagination
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views import View
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
-from .filters import (WeatherRecordFilterBackend,
-                      WeatherStationStatsFilterBackend)
-from .models import WeatherRecord, WeatherStationStats
-from .serializers import WeatherRecordSerializer, WeatherStationStatsSerializer
+from .analytics import yield_weather_correlation
+from .caching import (STATS_DATASET, get_generation, page_etag, page_key,
+                      queryset_etag, response_cache)
+from .columnar import (COLUMNAR_RENDERER_CLASSES, ColumnarRenderer,
+                       columnar_response)
 
+from .filters import (CropYieldRecordFilterBackend,
+                      WeatherRecordExportFilterBackend,
+                      WeatherRecordFilterBackend,
+                      WeatherRollupFilterBackend,
+                      WeatherStationStatsFilterBackend,
+                      YieldWeatherCorrelationFilterBackend, station_id_filter,
+                      year_range)
+from .models import (CropYieldRecord, NationalMonthRollup, NationalYearRollup,
+                     StationMonthRollup, WeatherRecord, WeatherStationStats)
+from .pagination import (ApproximateCountPaginator, ApproximateCountPagination,
+                         WeatherRecordKeysetPagination)
+from .periods import YEAR_PERIOD, period_names
+from .renderers import CSVRenderer, NDJSONRenderer
+from .serializers import (CropYieldRecordSerializer,
+                          NationalMonthRollupSerializer,
+                          NationalYearRollupSerializer,
+                          StationMonthRollupSerializer, WeatherRecordSerializer,
+                          WeatherStationStatsSerializer,
+                          YieldWeatherYearSerializer)
+from .streaming import (STREAM_CHUNK_SIZE, csv_stream, ndjson_stream,
+                        streaming_json_response)
 
-class WeatherRecordList(APIView, PageNumberPagination):
+
+class WeatherRecordList(APIView, ApproximateCountPagination):
     """
         This view must handle get and post requests for WeatherRecord model.
         Makes use of WeatherRecordSerializer.
-        Makes use of PageNumberPagination.
+        Makes use of ApproximateCountPagination, or of WeatherRecordKeysetPagination
+        when requested with pagination=cursor. Every matching record is
+        streamed in a single response when requested with pagination=stream,
+        or in Arrow IPC and Parquet formats when negotiated (pyarrow only).
+        Filtered pages carry an ETag, derived from the matching records, for
+        conditional requests. Pages carry the (possibly approximate) count of
+        records in X-Total-Count headers.
 
         get:
         Return list of weather records and pagination information.
     """
     filter_backends = (WeatherRecordFilterBackend,)
+    renderer_classes = (*api_settings.DEFAULT_RENDERER_CLASSES, *COLUMNAR_RENDERER_CLASSES)
 
     def get(self, request, format=None):
         queryset = WeatherRecord.objects.all()
 
-        # retrieving query parameters
-        station_id = self.request.query_params.get('station-id')
-        date = self.request.query_params.get('date')
-
         # filtering based on the query parameters
-        if station_id is not None:
-            queryset = queryset.filter(
-                weather_station__station_id__contains=station_id)
-        if date is not None:
-            try:
-                date = datetime.strptime(date, '%Y%m%d')
-                queryset = queryset.filter(date=date)
-            except ValueError as e:
-                return Response(status=HTTPStatus.BAD_REQUEST)
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(request, queryset, self)
+
+        # every matching record, column by column.
+        if isinstance(request.accepted_renderer, ColumnarRenderer):
+            return columnar_response(
+                queryset.order_by(*WeatherRecordKeysetPagination.ordering),
+                WeatherRecordSerializer, request.accepted_renderer, 'weather_records')
+
+        # fetch only the serialized columns, joined with the station.
+        queryset = WeatherRecordSerializer.values(
+            queryset, *WeatherRecordKeysetPagination.ordering)
+
+        # every matching record in a single response, fetched and sent in chunks.
+        if self.request.query_params.get('pagination') == 'stream':
+            return streaming_json_response(
+                queryset.order_by(*WeatherRecordKeysetPagination.ordering),
+                WeatherRecordSerializer)
+
+        # keyset pagination skips the count query and the deep offsets.
+        if self.request.query_params.get('pagination') == 'cursor':
+            paginator = WeatherRecordKeysetPagination()
+            weather_records_paginated = paginator.paginate_queryset(
+                queryset, request, view=self)
+            serializer = WeatherRecordSerializer(
+                weather_records_paginated, many=True)
+            return paginator.get_paginated_response(serializer.data)
+
+        # nothing is serialized when the client already holds a filtered page.
+        # The count of the validator spares the paginator its count query.
+        # Unfiltered pages skip the full table aggregate, and are counted
+        # approximately by the paginator instead.
+        etag = None
+        if queryset.query.where:
+            etag, records_count = queryset_etag(queryset, request.query_params, self.page_size)
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                return not_modified
+            self.django_paginator_class = partial(
+                ApproximateCountPaginator, count=records_count)
 
         # Invoke paginator on top of queryset
         weather_records_paginated = self.paginate_queryset(
@@ -53,39 +119,418 @@ class WeatherRecordList(APIView, PageNumberPagination):
         # serialize the paginated records.
         serializer = WeatherRecordSerializer(
             weather_records_paginated, many=True)
-        return Response(serializer.data)
+        response = Response(serializer.data, headers=self.get_count_headers())
+        if etag is not None:
+            response['ETag'] = etag
+        return response
+
+
+class WeatherRecordExport(APIView):
+    """
+        This view must handle get requests exporting WeatherRecord model.
+        Takes the filters of WeatherRecordList and streams every matching
+        record, read with a server side cursor and encoded straight from the
+        values_list tuples, so that memory stays constant whatever the size
+        of the export.
+
+        get:
+        Return matching weather records as NDJSON (default) or CSV.
+    """
+    filter_backends = (WeatherRecordExportFilterBackend,)
+    renderer_classes = (NDJSONRenderer, CSVRenderer)
+    export_fields = ('station_id', 'date', 'min_temp', 'max_temp', 'precipitation')
+    export_streams = {
+        NDJSONRenderer.format: ndjson_stream,
+        CSVRenderer.format: csv_stream,
+    }
+
+    def get(self, request, format=None):
+        queryset = WeatherRecord.objects.all()
 
+        # filtering based on the query parameters
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(request, queryset, self)
+
+        rows = queryset.order_by('weather_station_id', 'date').values_list(
+            'weather_station__station_id', 'date', 'min_temp', 'max_temp', 'precipitation'
+        ).iterator(chunk_size=STREAM_CHUNK_SIZE)
+
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            self.export_streams[renderer.format](rows, self.export_fields),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}')
+        response['Content-Disposition'] = f'attachment; filename="weather_records.{renderer.format}"'
+        return response
+
+
+def filter_weather_station_stats(queryset, query_params):
+    """
+        Filters weather station stats on the query parameters.
+
+        Args:
+        queryset (QuerySet): weather station stats.
+        query_params (QueryDict): query parameters of the request.
+
+        Returns:
+            QuerySet: filtered weather station stats.
 
-class WeatherStationStatsList(APIView, PageNumberPagination):
+        Raises:
+            ValueError: invalid station-id, station-match, period or complete.
+    """
+    # retrieving query parameters
+    station_id = query_params.get('station-id')
+    station_match = query_params.get('station-match')
+    year = query_params.get('year')
+    period = query_params.get('period', YEAR_PERIOD)
+    complete = query_params.get('complete')
+
+    if period not in period_names():
+        raise ValueError(f"Unknown period {period}")
+    queryset = queryset.filter(period=period)
+    if complete is not None:
+        if complete not in ('true', 'false'):
+            raise ValueError(f"Invalid complete {complete}")
+        queryset = queryset.filter(is_complete=complete == 'true')
+    if station_id is not None:
+        queryset = queryset.filter(station_id_filter(station_id, station_match))
+    if year is not None:
+        queryset = queryset.filter(year=int(year))
+    return queryset
+
+
+class WeatherStationStatsList(APIView, ApproximateCountPagination):
     """
         This view must handle get and post requests for WeatherStationStats model.
         Makes use of WeatherStationStatsSerializer.
-        Makes use of PageNumberPagination.
+        Makes use of ApproximateCountPagination. Every matching record is streamed
+        in Arrow IPC and Parquet formats when negotiated (pyarrow only).
+        Serialized pages are cached until the stats are written again, and
+        carry ETag and Last-Modified headers for conditional requests.
 
         get:
         Return list of weather Station stats and pagination information.
     """
     filter_backends = (WeatherStationStatsFilterBackend,)
+    renderer_classes = (*api_settings.DEFAULT_RENDERER_CLASSES, *COLUMNAR_RENDERER_CLASSES)
+    # the default period filter alone still lists every station year.
+    django_paginator_class = partial(
+        ApproximateCountPaginator, unfiltered_lookups={'period': YEAR_PERIOD})
 
     def get(self, request, format=None):
         queryset = WeatherStationStats.objects.all()
 
-        # retrieving query parameters
-        station_id = self.request.query_params.get('station-id')
-        year = self.request.query_params.get('year')
+        # filtering based on the query parameters
+        try:
+            queryset = filter_weather_station_stats(queryset, request.query_params)
+        except ValueError as e:
+            return Response(status=HTTPStatus.BAD_REQUEST)
+
+        # every matching record, column by column.
+        if isinstance(request.accepted_renderer, ColumnarRenderer):
+            return columnar_response(
+                queryset.order_by('weather_station_id', 'year'),
+                WeatherStationStatsSerializer, request.accepted_renderer, 'weather_station_stats')
+
+        # pages are cached until the stats script writes a new generation.
+        generation = get_generation(STATS_DATASET)
+        key = page_key(generation, request.query_params, self.page_size)
+        etag = page_etag(key)
+        last_modified = int(generation.update_timestamp.timestamp())
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        cache = response_cache()
+        page = cache.get(key)
+        if page is None:
+            # fetch only the serialized columns, joined with the station.
+            queryset = WeatherStationStatsSerializer.values(queryset)
+
+            # Invoke paginator on top of queryset
+            weather_station_stats_paginated = self.paginate_queryset(
+                queryset, request, view=self)
+
+            # serialize the paginated records.
+            serializer = WeatherStationStatsSerializer(
+                weather_station_stats_paginated, many=True)
+            page = {'data': list(serializer.data), 'headers': self.get_count_headers()}
+            cache.set(key, page, getattr(settings, 'STATS_CACHE_TIMEOUT', None))
+
+        response = Response(page['data'], headers=page['headers'])
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class CropYieldRecordList(APIView, ApproximateCountPagination):
+    """
+        This view must handle get requests for CropYieldRecord model.
+        Makes use of CropYieldRecordSerializer.
+        Makes use of ApproximateCountPagination. Every matching record is streamed
+        in Arrow IPC and Parquet formats when negotiated (pyarrow only).
+
+        get:
+        Return list of crop yield records and pagination information.
+    """
+    filter_backends = (CropYieldRecordFilterBackend,)
+    renderer_classes = (*api_settings.DEFAULT_RENDERER_CLASSES, *COLUMNAR_RENDERER_CLASSES)
+
+    def get(self, request, format=None):
+        queryset = CropYieldRecord.objects.all()
+
+        # filtering based on the query parameters
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(request, queryset, self)
+        queryset = queryset.order_by('year')
+
+        # every matching record, column by column.
+        if isinstance(request.accepted_renderer, ColumnarRenderer):
+            return columnar_response(
+                queryset, CropYieldRecordSerializer, request.accepted_renderer, 'crop_yield_records')
+
+        # Invoke paginator on top of queryset
+        crop_yield_records_paginated = self.paginate_queryset(
+            CropYieldRecordSerializer.values(queryset), request, view=self)
+
+        # serialize the paginated records.
+        serializer = CropYieldRecordSerializer(
+            crop_yield_records_paginated, many=True)
+        return Response(serializer.data, headers=self.get_count_headers())
+
+
+class YieldWeatherCorrelation(APIView):
+    """
+        This view must handle get requests correlating CropYieldRecord model
+        with the national aggregates of WeatherStationStats model, computed
+        in a single query.
+        Makes use of YieldWeatherYearSerializer.
+
+        get:
+        Return the Pearson correlations of the yield with the national
+        aggregates, and the yield next to the aggregates of every year.
+    """
+    filter_backends = (YieldWeatherCorrelationFilterBackend,)
+
+    def get(self, request, format=None):
+        start_year, end_year = year_range(request.query_params)
+        correlation = yield_weather_correlation(start_year, end_year)
+        serializer = YieldWeatherYearSerializer(correlation['years'], many=True)
+        return Response({
+            'correlations': correlation['correlations'],
+            'years_count': len(serializer.data),
+            'years': serializer.data,
+        })
+
+
+class WeatherRollupList(APIView, ApproximateCountPagination):
+    """
+        Base of the views listing a rollup model, maintained by the rollups
+        module. Reading a rollup is a lookup on its unique key rather than an
+        aggregate over the weather records or the weather station stats.
+    """
+    filter_backends = (WeatherRollupFilterBackend,)
+    model = None
+    serializer_class = None
+    ordering = ()
+
+    def get(self, request, format=None):
+        queryset = self.model.objects.all()
 
         # filtering based on the query parameters
-        if station_id is not None:
-            queryset = queryset.filter(
-                weather_station__station_id__contains=station_id)
-        if year is not None:
-            queryset = queryset.filter(year=int(year))
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(request, queryset, self)
 
         # Invoke paginator on top of queryset
-        weather_station_stats_paginated = self.paginate_queryset(
+        rollups_paginated = self.paginate_queryset(
+            self.serializer_class.values(queryset.order_by(*self.ordering)), request, view=self)
+
+        # serialize the paginated rollups.
+        serializer = self.serializer_class(rollups_paginated, many=True)
+        return Response(serializer.data, headers=self.get_count_headers())
+
+
+class NationalYearRollupList(WeatherRollupList):
+    """
+        This view must handle get requests for NationalYearRollup model.
+        Makes use of NationalYearRollupSerializer.
+
+        get:
+        Return list of yearly statistics averaged over the weather stations.
+    """
+    model = NationalYearRollup
+    serializer_class = NationalYearRollupSerializer
+    ordering = ('year',)
+
+
+class NationalMonthRollupList(WeatherRollupList):
+    """
+        This view must handle get requests for NationalMonthRollup model.
+        Makes use of NationalMonthRollupSerializer.
+
+        get:
+        Return list of monthly statistics averaged over the weather stations.
+    """
+    model = NationalMonthRollup
+    serializer_class = NationalMonthRollupSerializer
+    ordering = ('year', 'month')
+
+
+class StationMonthRollupList(WeatherRollupList):
+    """
+        This view must handle get requests for StationMonthRollup model.
+        Makes use of StationMonthRollupSerializer.
+
+        get:
+        Return list of monthly statistics of the weather stations.
+    """
+    model = StationMonthRollup
+    serializer_class = StationMonthRollupSerializer
+    ordering = ('weather_station_id', 'year', 'month')
+
+
+class AsyncAPIView(View):
+    """
+        Base of the async list views. DRF views are synchronous, hence these
+        are Django async views: requests are wrapped in DRF Request for the
+        filter backends and paginators, responses are rendered with
+        JSONRenderer and API exceptions answered as DRF does, so that the
+        JSON matches the sync views.
+    """
+    renderer_class = JSONRenderer
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(Request(request), *args, **kwargs)
+        except APIException as exc:
+            return self.render({'detail': exc.detail}, status=exc.status_code)
+
+    def render(self, data, status=HTTPStatus.OK, headers=None):
+        """
+            Renders a JSON response.
+
+            Args:
+            data (object): serialized data, None for an empty body.
+            status (int): response status code.
+            headers (dict): response headers.
+
+            Returns:
+                HttpResponse: JSON response.
+        """
+        response = HttpResponse(self.renderer_class().render(data), status=status, headers=headers,
+                                content_type=self.renderer_class.media_type)
+        # empty bodies have no content type, as in DRF.
+        if not response.content:
+            del response['Content-Type']
+        return response
+
+
+class AsyncWeatherRecordList(AsyncAPIView, ApproximateCountPagination):
+    """
+        Async counterpart of WeatherRecordList, fetching the records with
+        the async queryset api so that no thread is held while waiting on
+        the database under ASGI. Serves the page number and cursor
+        paginations, streamed and columnar responses are left to
+        WeatherRecordList.
+
+        get:
+        Return list of weather records and pagination information.
+    """
+    filter_backends = (WeatherRecordFilterBackend,)
+
+    async def get(self, request, format=None):
+        queryset = WeatherRecord.objects.all()
+
+        # filtering based on the query parameters
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(request, queryset, self)
+
+        if request.query_params.get('pagination') == 'stream':
+            raise ParseError('pagination=stream is only served by /v1/api/weather')
+
+        # fetch only the serialized columns, joined with the station.
+        queryset = WeatherRecordSerializer.values(
+            queryset, *WeatherRecordKeysetPagination.ordering)
+
+        # keyset pagination skips the count query and the deep offsets.
+        if request.query_params.get('pagination') == 'cursor':
+            paginator = WeatherRecordKeysetPagination()
+            weather_records_paginated = await paginator.apaginate_queryset(
+                queryset, request, view=self)
+            serializer = WeatherRecordSerializer(
+                weather_records_paginated, many=True)
+            return self.render(paginator.get_paginated_response(serializer.data).data)
+
+        # filtered pages are validated as in WeatherRecordList.
+        etag = None
+        if queryset.query.where:
+            etag, records_count = await sync_to_async(queryset_etag)(
+                queryset, request.query_params, self.page_size)
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                return not_modified
+            self.django_paginator_class = partial(
+                ApproximateCountPaginator, count=records_count)
+
+        # Invoke paginator on top of queryset
+        weather_records_paginated = await self.apaginate_queryset(
             queryset, request, view=self)
 
         # serialize the paginated records.
-        serializer = WeatherStationStatsSerializer(
-            weather_station_stats_paginated, many=True)
-        return Response(serializer.data)
+        serializer = WeatherRecordSerializer(
+            weather_records_paginated, many=True)
+        response = self.render(serializer.data, headers=self.get_count_headers())
+        if etag is not None:
+            response['ETag'] = etag
+        return response
+
+
+class AsyncWeatherStationStatsList(AsyncAPIView, ApproximateCountPagination):
+    """
+        Async counterpart of WeatherStationStatsList, sharing its cached
+        pages. Columnar responses are left to WeatherStationStatsList.
+
+        get:
+        Return list of weather Station stats and pagination information.
+    """
+    django_paginator_class = WeatherStationStatsList.django_paginator_class
+
+    async def get(self, request, format=None):
+        queryset = WeatherStationStats.objects.all()
+
+        # filtering based on the query parameters
+        try:
+            queryset = filter_weather_station_stats(queryset, request.query_params)
+        except ValueError as e:
+            return self.render(None, status=HTTPStatus.BAD_REQUEST)
+
+        # pages are cached until the stats script writes a new generation.
+        generation = await sync_to_async(get_generation)(STATS_DATASET)
+        key = page_key(generation, request.query_params, self.page_size)
+        etag = page_etag(key)
+        last_modified = int(generation.update_timestamp.timestamp())
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        cache = response_cache()
+        page = await cache.aget(key)
+        if page is None:
+            # fetch only the serialized columns, joined with the station.
+            queryset = WeatherStationStatsSerializer.values(queryset)
+
+            # Invoke paginator on top of queryset
+            weather_station_stats_paginated = await self.apaginate_queryset(
+                queryset, request, view=self)
+
+            # serialize the paginated records.
+            serializer = WeatherStationStatsSerializer(
+                weather_station_stats_paginated, many=True)
+            page = {'data': list(serializer.data), 'headers': self.get_count_headers()}
+            await cache.aset(key, page, getattr(settings, 'STATS_CACHE_TIMEOUT', None))
+
+        response = self.render(page['data'], headers=page['headers'])
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -0,0 +1,171 @@
+"""
+    This module contains the process pool used by the ingestion scripts of
+    weather_crop_info app. Files are scheduled largest first and consumed in
+    completion order, so that a single large file does not end up as the
+    straggler of the run.
+
+    Every worker sets up Django on its own, so that both the fork and the
+    spawn start methods are supported, and holds one persistent database
+    connection reused for every file it handles. This module must stay
+    importable before Django is set up, hence models are not imported here.
+
+    Author: Chandrahas Reddy Mandapati
+"""
+import multiprocessing as mp
+import os
+import time
+from collections import defaultdict
+from functools import partial
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# database connections inherited from the parent process through fork.
+# References are kept so that they are never closed from the worker, which
+# would terminate the session the parent process still uses.
+_inherited_connections = []
+
+
+def pool_size(tasks_count, requested_size=None):
+    """
+        Number of worker processes to be used for a number of tasks. Defaults
+        to INGESTION_POOL_SIZE setting, or to the number of CPUs when it is
+        not set, and is always capped by the INGESTION_DB_CONNECTION_BUDGET
+        setting since every worker holds its own database connection.
+
+        Args:
+        tasks_count (int): number of tasks to be processed.
+        requested_size (int): explicitly requested pool size.
+
+        Returns:
+            int: pool size.
+    """
+    size = requested_size or getattr(
+        settings, 'INGESTION_POOL_SIZE', None) or os.cpu_count() or 1
+    budget = getattr(settings, 'INGESTION_DB_CONNECTION_BUDGET', None)
+    if budget:
+        size = min(size, budget)
+    return max(1, min(size, tasks_count))
+
+
+def pool_size_arg(args):
+    """
+        Extracts the pool_size=<n> script argument.
+
+        Args:
+        args (tuple): script arguments.
+
+        Returns:
+            int: requested pool size, None when not provided.
+    """
+    for arg in args:
+        if arg.startswith('pool_size='):
+            return int(arg.split('=', 1)[1])
+    return None
+
+
+def start_method():
+    """
+        Multiprocessing start method of the ingestion pools, as set in
+        INGESTION_START_METHOD setting. Platform default when not set.
+
+        Returns:
+            String: start method, None for the platform default.
+    """
+    return getattr(settings, 'INGESTION_START_METHOD', None)
+
+
+def init_worker():
+    """
+        Pool initializer. Sets up Django when the worker was spawned, drops
+        the database connections inherited through fork without closing
+        them and opens the one connection the worker reuses for every task.
+
+        Args:
+            Accepts No Args.
+
+        Returns:
+            None.
+    """
+    if not apps.ready:
+        django.setup()
+
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is not None:
+            _inherited_connections.append(connection.connection)
+        del connections[connection.alias]
+
+    connections[DEFAULT_DB_ALIAS].ensure_connection()
+
+
+def _timed_call(function, args):
+    """
+        Pool entry point measuring the time a worker spends on a task.
+        The persistent connection of the worker is reopened beforehand in
+        case the database server has dropped it.
+
+        Args:
+        function (Callable): task function.
+        args (list): task function arguments.
+
+        Returns:
+            int: worker process id.
+            float: seconds spent on the task.
+            list: task function arguments.
+            object: task function result.
+    """
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.connection is not None and not connection.is_usable():
+        connection.close()
+
+    start_time = time.monotonic()
+    result = function(*args)
+    return os.getpid(), time.monotonic() - start_time, args, result
+
+
+def process_files(function, pool_args, on_result=None, requested_size=None):
+    """
+        Processes files parallely with function(*args) for every args of
+        pool_args, whose first item is the file path. Files are scheduled
+        largest first and results are consumed in completion order. A per
+        worker utilization summary is printed at the end.
+
+        Args:
+        function (Callable): module level task function.
+        pool_args (list): task function arguments, file path first.
+        on_result (Callable): invoked in this process with the arguments and
+            the result of every task, as soon as it completes.
+        requested_size (int): explicitly requested pool size.
+
+        Returns:
+            list: task function results, in completion order.
+    """
+    pool_args = sorted(pool_args, key=lambda args: os.path.getsize(args[0]), reverse=True)
+    size = pool_size(len(pool_args), requested_size)
+    busy_seconds = defaultdict(float)
+    tasks_counts = defaultdict(int)
+    results = []
+
+    # connections of this process must not leak into forked workers.
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close()
+
+    start_time = time.monotonic()
+    with mp.get_context(start_method()).Pool(size, initializer=init_worker) as pool:
+        for pid, seconds, args, result in pool.imap_unordered(
+                partial(_timed_call, function), pool_args):
+            busy_seconds[pid] += seconds
+            tasks_counts[pid] += 1
+            results.append(result)
+            if on_result is not None:
+                on_result(args, result)
+    elapsed = time.monotonic() - start_time
+
+    print(f"Processed {len(pool_args)} files with {size} workers in {elapsed} seconds")
+    for pid in sorted(busy_seconds):
+        print(f"    worker {pid}: {tasks_counts[pid]} files, {busy_seconds[pid]:.3f} seconds busy, \
+{100 * busy_seconds[pid] / elapsed if elapsed else 0:.1f}% utilization")
+    return results
@@ -139,10 +139,52 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Caches
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# Local memory by default, a shared backend such as
+# django.core.cache.backends.redis.RedisCache may be configured instead.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 # Developer Defined Settings
 WEATHER_DATA_DIR = BASE_DIR / 'wx_data'
 CROP_YIELD_DATA_DIR = BASE_DIR / 'yld_data'
 
+# Ingestion worker processes, defaults to the number of CPUs when None.
+# Capped by the number of database connections the ingestion may hold.
+INGESTION_POOL_SIZE = None
+INGESTION_DB_CONNECTION_BUDGET = 20
+
+# Multiprocessing start method of the ingestion workers ('fork', 'spawn' or
+# 'forkserver'), platform default when None.
+INGESTION_START_METHOD = None
+
+# Cache of the stats api pages, see CACHES. Cached pages are invalidated by
+# the calculate_weather_station_stats script through the DatasetGeneration model.
+STATS_CACHE_ALIAS = 'default'
+STATS_CACHE_TIMEOUT = 24 * 60 * 60
+
+# periods of the weather station stats besides the year and every month, as
+# inclusive ((start month, start day), (end month, end day)) windows within a
+# year. Stats are recalculated for a new period by a full rebuild.
+WEATHER_STATS_PERIODS = {
+    'growing_season': ((4, 1), (9, 30)),
+}
+
+# Weather station stats missing more than this fraction of the days of their
+# period, for any metric, are flagged incomplete.
+WEATHER_STATS_MISSING_DATA_THRESHOLD = 0.1
+
+# Unfiltered list api pages over tables of at least this many records are
+# counted approximately, from the planner estimate on PostgreSQL or from an
+# exact count cached for PAGINATION_COUNT_CACHE_TIMEOUT seconds otherwise.
+PAGINATION_APPROXIMATE_COUNT_THRESHOLD = 100000
+PAGINATION_COUNT_CACHE_TIMEOUT = 300
+
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,